@@ -0,0 +1,114 @@
+import csv
+import os
+import queue
+import threading
+
+
+class AlertFileReader:
+    """Tail-follows the alert CSV, parsing only rows appended since the last read.
+
+    The reader remembers the byte offset just past the last complete line it
+    consumed. A trailing partial line (a writer mid-append) is left for the
+    next call, and a file that shrank below the offset is assumed to have been
+    recreated and is read again from the start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.header = None
+
+    def read_new(self):
+        """Return newly appended rows as dicts keyed by the header."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            self.reset()
+        if size == self.offset:
+            return []
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(size - self.offset)
+
+        end = data.rfind(b'\n')
+        if end < 0:
+            return []
+        self.offset += end + 1
+        lines = data[:end + 1].decode('utf-8').splitlines()
+
+        rows = csv.reader(lines)
+        if self.header is None:
+            self.header = next(rows, None)
+            if self.header is None:
+                return []
+        header = self.header
+        return [dict(zip(header, row)) for row in rows if row]
+
+
+class AlertChannel:
+    """Bounded, thread-safe hand-off of alerts from producers to the sim tick.
+
+    Producers call ``put()``; when the channel is full they block for up to
+    ``timeout`` seconds (backpressure) and the alert is counted as dropped if
+    room never frees up. The simulation drains at most ``batch_size`` alerts
+    per tick with ``drain()``, so a burst is spread over several ticks rather
+    than stalling one.
+    """
+
+    def __init__(self, maxsize=1024, batch_size=64):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.produced = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def put(self, alert, timeout=None):
+        """Queue an alert; returns False if it was dropped because the channel stayed full."""
+        try:
+            self.queue.put(alert, timeout=timeout)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+        depth = self.queue.qsize()
+        with self.lock:
+            self.produced += 1
+            if depth > self.high_water:
+                self.high_water = depth
+        return True
+
+    def drain(self, limit=None):
+        """Take up to ``limit`` (default ``batch_size``) queued alerts without blocking."""
+        limit = self.batch_size if limit is None else limit
+        alerts = []
+        get = self.queue.get_nowait
+        try:
+            while len(alerts) < limit:
+                alerts.append(get())
+        except queue.Empty:
+            pass
+        if alerts:
+            with self.lock:
+                self.consumed += len(alerts)
+        return alerts
+
+    def clear(self):
+        self.drain(limit=self.queue.maxsize or self.queue.qsize())
+
+    def stats(self):
+        with self.lock:
+            return {
+                'depth': self.queue.qsize(),
+                'produced': self.produced,
+                'consumed': self.consumed,
+                'dropped': self.dropped,
+                'high_water': self.high_water,
+            }
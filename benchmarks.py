@@ -0,0 +1,397 @@
+"""Headless benchmarks for planner latency and tick throughput.
+
+Every case builds a seeded engine, times the operation under test and
+reports wall-time percentiles in milliseconds together with memory use.
+Results are written as JSON; ``--baseline`` compares them against an
+earlier results file and exits non-zero when a case got slower than the
+allowed tolerance, so the suite can gate regressions.
+
+    python benchmarks.py --out bench.json
+    python benchmarks.py --quick --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from sim_engine import SimulationEngine, TICK_RATE
+
+# Published target: replanning at 120 Hz with under 50 ms latency
+CLAIM_LATENCY_MS = 50.0
+CLAIM_RATE_HZ = 120
+# Timed replans per planner case query, each after a forced obstacle move
+REPLAN_STEPS = 8
+
+
+def summarize(samples):
+    """Percentiles of a list of durations in seconds, reported in milliseconds."""
+    ms = np.asarray(samples, dtype=float) * 1000.0
+    if not len(ms):
+        return {'count': 0}
+    return {
+        'count': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def scatter_obstacles(engine, count):
+    """Place count obstacles on random cells with random headings."""
+    n = engine.grid_size
+    rng = engine.np_random
+    cells = rng.integers(0, n, size=(count, 2))
+    headings = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])[rng.integers(0, 4, count)]
+    for (x, y), (dx, dy) in zip(cells.tolist(), headings.tolist()):
+        engine.obstacles.spawn(x, y, dx, dy)
+    engine.obstacle_field.apply(added=cells)
+
+
+def build_engine(grid_size, building_density, obstacles, seed, hospitals=5, path_cache_size=0):
+    """Seeded engine with a random layout; returns it with its state size in bytes."""
+    tracemalloc.start()
+    engine = SimulationEngine(grid_size=grid_size, alert_file=None,
+                              path_cache_size=path_cache_size, seed=seed)
+    engine.random_layout(hospitals, building_density)
+    scatter_obstacles(engine, obstacles)
+    engine.simulation_running = True
+    engine.blocked_mask()
+    _, state_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return engine, state_bytes
+
+
+def random_pairs(engine, count):
+    """Distinct (start, end) pairs of free cells drawn from the engine's RNG."""
+    n = engine.grid_size
+    free = np.flatnonzero(~engine.blocked_mask())
+    picks = engine.np_random.choice(free, size=(count, 2))
+    return [((int(a % n), int(a // n)), (int(b % n), int(b // n))) for a, b in picks if a != b]
+
+
+def time_replans(engine, pairs):
+    """Durations of ``replan_drone()`` for a drone flying each (start, end) pair.
+
+    Before every timed replan the drone steps onto the next cell of its
+    path and the obstacles are forced to move, as they only do every
+    ``obstacle_move_interval`` ticks, so each sample plans around new costs.
+    """
+    drones = engine.drones
+    samples = []
+    for i, (start, end) in enumerate(pairs):
+        slot = drones.add(f"bench{i}", start, end, engine.find_path(start, end), None, 'Medical')
+        path = drones.path(slot)
+        for _ in range(REPLAN_STEPS):
+            if not path:
+                break
+            drones.pos[slot] = path[0]
+            engine.obstacle_move_timer = engine.obstacle_move_interval - 1
+            engine.update_moving_obstacles()
+            started = time.perf_counter()
+            path = engine.replan_drone(slot)
+            samples.append(time.perf_counter() - started)
+        drones.remove(slot)
+    return samples
+
+
+def bench_planner_case(grid_size, building_density, obstacles, queries, seed):
+    engine, state_bytes = build_engine(grid_size, building_density, obstacles, seed)
+    pairs = random_pairs(engine, queries)
+
+    find_path = []
+    expansions = engine.astar.expansions
+    found = 0
+    for start, end in pairs:
+        started = time.perf_counter()
+        path = engine.find_path(start, end)
+        find_path.append(time.perf_counter() - started)
+        found += bool(path)
+    expansions = engine.astar.expansions - expansions
+
+    # Replanning as the engine does it: a fresh A* search
+    engine.max_obstacles = len(engine.obstacles)
+    replan = time_replans(engine, pairs[:max(1, len(pairs) // 4)])
+
+    proximity = []
+    cells = [start for start, _ in pairs]
+    for x, y in cells:
+        started = time.perf_counter()
+        engine.check_obstacle_proximity((x, y))
+        proximity.append(time.perf_counter() - started)
+
+    return {
+        'grid_size': grid_size,
+        'building_density': building_density,
+        'obstacles': obstacles,
+        'queries': len(pairs),
+        'paths_found': found,
+        'expansions_per_query': expansions / max(1, len(pairs)),
+        'find_path': summarize(find_path),
+        'replan': summarize(replan),
+        'check_obstacle_proximity': summarize(proximity),
+        'state_bytes': state_bytes,
+    }
+
+
+def bench_fleet_case(fleet_size, grid_size, ticks, seed):
+    engine, state_bytes = build_engine(grid_size, 0.1, min(engine_obstacles(grid_size), 1000), seed,
+                                       hospitals=10, path_cache_size=1024)
+    engine.max_obstacles = len(engine.obstacles)
+    hospitals = list(engine.hospitals.items())
+
+    def dispatch():
+        # Keep the fleet at full strength as drones deliver
+        while len(engine.drones) < fleet_size:
+            (origin_pos, origin), (dest_pos, dest) = engine.random.sample(hospitals, 2)
+            engine.create_new_drone(origin, origin_pos, dest, dest_pos, 'Medical')
+
+    drone_times = []
+    update_drones = engine.update_drones
+
+    def timed_update_drones():
+        started = time.perf_counter()
+        update_drones()
+        drone_times.append(time.perf_counter() - started)
+
+    engine.update_drones = timed_update_drones
+
+    tick_times = []
+    for _ in range(ticks):
+        dispatch()
+        started = time.perf_counter()
+        engine.update_simulation()
+        tick_times.append(time.perf_counter() - started)
+
+    total = sum(tick_times)
+    return {
+        'fleet_size': fleet_size,
+        'grid_size': grid_size,
+        'ticks': ticks,
+        'ticks_per_second': ticks / total if total else 0.0,
+        'realtime_factor': ticks / TICK_RATE / total if total else 0.0,
+        'tick': summarize(tick_times),
+        'update_drones': summarize(drone_times),
+        'deliveries': engine.total_deliveries,
+        'state_bytes': state_bytes,
+    }
+
+
+def bench_hierarchical_case(grid_size, queries, distance, seed, astar=True):
+    """HPA* against plain A* for queries of a fixed length on one grid size.
+
+    Fixed-length queries show how latency depends on the map size alone.
+    The first pass over the queries fills the hierarchy's lazily cached
+    cluster costs; the second pass is timed warm.
+    """
+    engine, state_bytes = build_engine(grid_size, 0.1, engine_obstacles(grid_size), seed)
+    n = grid_size
+    blocked = engine.blocked_mask()
+    rng = engine.np_random
+    pairs = []
+    while len(pairs) < queries:
+        x, y = rng.integers(0, n - distance, size=2).tolist()
+        if not blocked[y * n + x] and not blocked[y * n + x + distance]:
+            pairs.append(((x, y), (x + distance, y)))
+
+    hierarchy = engine.hierarchy
+    started = time.perf_counter()
+    hierarchy.refresh()
+    build = time.perf_counter() - started
+
+    cold = []
+    for start, end in pairs:
+        started = time.perf_counter()
+        hierarchy.find_path(start, end)
+        cold.append(time.perf_counter() - started)
+    warm = []
+    expansions = hierarchy.expansions
+    for start, end in pairs:
+        started = time.perf_counter()
+        hierarchy.find_path(start, end)
+        warm.append(time.perf_counter() - started)
+    expansions = hierarchy.expansions - expansions
+
+    result = {
+        'grid_size': grid_size,
+        'distance': distance,
+        'queries': len(pairs),
+        'build_ms': build * 1000.0,
+        'hpa_cold': summarize(cold),
+        'hpa': summarize(warm),
+        'abstract_expansions_per_query': expansions / max(1, len(pairs)),
+        'state_bytes': state_bytes,
+    }
+    if astar:
+        samples = []
+        for start, end in pairs:
+            started = time.perf_counter()
+            engine.astar.find_path(start, end, engine.grid)
+            samples.append(time.perf_counter() - started)
+        result['astar'] = summarize(samples)
+    return result
+
+
+def engine_obstacles(grid_size):
+    """Default obstacle count scaling with grid area (200 on a 100x100 grid)."""
+    return max(20, grid_size * grid_size // 50)
+
+
+def bench_draw(fleet_sizes, frames, seed):
+    """Frame times of the pygame viewer on a dummy display, if pygame is installed."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(
+            'enhanced_sim', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enhanced-sim.py'))
+        viewer = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(viewer)
+    except ImportError as e:
+        return {'skipped': str(e)}
+
+    results = []
+    for fleet_size in fleet_sizes:
+        engine = SimulationEngine(grid_size=viewer.GRID_SIZE, alert_file=None, seed=seed)
+        engine.random_layout(5, 0.1)
+        sim = viewer.EnhancedGridSim(engine)
+        engine.start(alerts=False)
+        hospitals = list(engine.hospitals.items())
+        for _ in range(fleet_size):
+            (origin_pos, origin), (dest_pos, dest) = engine.random.sample(hospitals, 2)
+            engine.create_new_drone(origin, origin_pos, dest, dest_pos, 'Medical')
+        samples = []
+        for _ in range(frames):
+            sim.update_simulation()
+            started = time.perf_counter()
+            sim.draw()
+            samples.append(time.perf_counter() - started)
+        results.append({'fleet_size': fleet_size, 'draw': summarize(samples)})
+    return results
+
+
+def run_suite(quick=False, seed=1, draw=False):
+    if quick:
+        grid_sizes, densities, obstacle_counts = [50, 100], [0.0, 0.2], [0, 400]
+        fleet_sizes, queries, ticks = [10, 100], 50, 300
+        hierarchical_sizes = [200, 400]
+    else:
+        grid_sizes, densities, obstacle_counts = [25, 50, 100, 200, 400], [0.0, 0.1, 0.2, 0.3], [0, 100, 400, 1600]
+        fleet_sizes, queries, ticks = [10, 50, 100, 200], 200, 600
+        hierarchical_sizes = [200, 400, 800, 1600]
+
+    # Vary one dimension at a time around a 100x100 grid, 10% buildings, 200 obstacles
+    planner = []
+    for grid_size in grid_sizes:
+        planner.append(bench_planner_case(grid_size, 0.1, engine_obstacles(grid_size), queries, seed))
+    for density in densities:
+        planner.append(bench_planner_case(100, density, 200, queries, seed))
+    for obstacles in obstacle_counts:
+        planner.append(bench_planner_case(100, 0.1, obstacles, queries, seed))
+
+    fleet = [bench_fleet_case(size, 100, ticks, seed) for size in fleet_sizes]
+    hierarchical = [bench_hierarchical_case(size, 20, 180, seed) for size in hierarchical_sizes]
+
+    default = next(case for case in planner if case['grid_size'] == 100)
+    replan_p95 = default['replan'].get('p95_ms', 0.0)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'quick': quick,
+        },
+        'planner': planner,
+        'fleet': fleet,
+        'hierarchical': hierarchical,
+        'claims': {
+            'replan_p95_ms': replan_p95,
+            'replan_under_50ms': replan_p95 < CLAIM_LATENCY_MS,
+            'replan_rate_hz_at_p95': 1000.0 / replan_p95 if replan_p95 else None,
+            'replan_rate_meets_120hz': replan_p95 * CLAIM_RATE_HZ < 1000.0,
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if draw:
+        results['draw'] = bench_draw([1, 10, 100], 120 if quick else 600, seed)
+    return results
+
+
+def case_key(section, case):
+    keys = ('grid_size', 'building_density', 'obstacles', 'fleet_size')
+    return (section,) + tuple(case.get(key) for key in keys)
+
+
+def compare(results, baseline, tolerance):
+    """Return descriptions of cases whose median got slower than the tolerance allows."""
+    regressions = []
+    metrics = {'planner': ('find_path', 'replan'), 'fleet': ('tick',), 'hierarchical': ('hpa',)}
+    for section, names in metrics.items():
+        previous = {case_key(section, case): case for case in baseline.get(section, [])}
+        for case in results.get(section, []):
+            old = previous.get(case_key(section, case))
+            if old is None:
+                continue
+            for name in names:
+                before = old.get(name, {}).get('p50_ms')
+                after = case.get(name, {}).get('p50_ms')
+                if before and after and after > before * (1 + tolerance):
+                    regressions.append(f"{section} {case_key(section, case)[1:]} {name}: "
+                                       f"p50 {before:.3f} -> {after:.3f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark planner latency and tick throughput.")
+    parser.add_argument('--out', default='bench_results.json', help="where to write the JSON results")
+    parser.add_argument('--quick', action='store_true', help="smaller sweep for CI")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--draw', action='store_true', help="also time the pygame viewer's draw()")
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown of a case's median before failing")
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.seed, args.draw)
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    for case in results['planner']:
+        print(f"grid {case['grid_size']:>4} density {case['building_density']:.2f} "
+              f"obstacles {case['obstacles']:>5}: find_path p50 {case['find_path']['p50_ms']:.3f} ms "
+              f"p95 {case['find_path']['p95_ms']:.3f} ms, replan p95 {case['replan']['p95_ms']:.3f} ms")
+    for case in results['fleet']:
+        print(f"fleet {case['fleet_size']:>5}: {case['ticks_per_second']:.0f} ticks/s, "
+              f"tick p95 {case['tick']['p95_ms']:.3f} ms")
+    for case in results['hierarchical']:
+        print(f"HPA* grid {case['grid_size']:>5}, {case['distance']}-cell queries: p50 {case['hpa']['p50_ms']:.3f} ms "
+              f"(A* {case['astar']['p50_ms']:.3f} ms), build {case['build_ms']:.0f} ms")
+    print(f"Claims: {results['claims']}")
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+
+# Map cell codes, stored as-is in the engine's uint8 grid and in .npy maps
+EMPTY = 0
+HOSPITAL = 1
+BUILDING = 2
+
+NETPBM_FORMATS = {'.pgm': b'P5', '.ppm': b'P6'}
+
+
+def load_map(path):
+    """Read a square map into an (n, n) uint8 grid of cell codes.
+
+    ``.npy`` files hold the codes themselves and are memory-mapped
+    copy-on-write, so opening one costs no more than the mmap: pages are
+    read as they are touched, and edits stay in memory. Binary PGM (P5)
+    and PPM (P6) rasters are memory-mapped too and decoded in one
+    vectorised pass: dark pixels are buildings, and in colour images red
+    pixels are hospitals. Other image formats are decoded the same way
+    through Pillow, if it is installed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        grid = np.load(path, mmap_mode='c', allow_pickle=False)
+        if grid.dtype != np.uint8:
+            raise ValueError(f"Map array must be uint8 cell codes, not {grid.dtype}")
+    elif extension in NETPBM_FORMATS:
+        grid = decode(*read_netpbm(path))
+    else:
+        try:
+            from PIL import Image
+        except ImportError as e:
+            raise ValueError(f"Reading {extension} maps needs Pillow; use .npy, .pgm or .ppm") from e
+        with Image.open(path) as image:
+            pixels = np.asarray(image.convert('L' if image.mode in ('1', 'L') else 'RGB'))
+        grid = decode(pixels, 255)
+
+    if grid.ndim != 2 or grid.shape[0] != grid.shape[1]:
+        raise ValueError(f"Maps must be square, got shape {grid.shape}")
+    return grid
+
+
+def save_map(grid, path):
+    """Write a grid of cell codes in the format given by the extension of ``path``.
+
+    PGM keeps buildings only; ``.npy``, PPM and Pillow formats round-trip
+    hospitals as well.
+    """
+    grid = np.asarray(grid, dtype=np.uint8)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        np.save(path, grid)
+    elif extension == '.pgm':
+        write_netpbm(path, np.where(grid == BUILDING, 0, 255).astype(np.uint8))
+    elif extension == '.ppm':
+        write_netpbm(path, encode(grid))
+    else:
+        try:
+            from PIL import Image
+        except ImportError as e:
+            raise ValueError(f"Writing {extension} maps needs Pillow; use .npy, .pgm or .ppm") from e
+        Image.fromarray(encode(grid)).save(path)
+
+
+def decode(pixels, maxval):
+    """Cell codes for (h, w) grey or (h, w, 3) RGB pixels with values up to ``maxval``."""
+    if pixels.ndim == 2:
+        return np.where(pixels < (maxval + 1) // 2, BUILDING, EMPTY).astype(np.uint8)
+    half = (maxval + 1) // 2
+    red, green, blue = (pixels[..., channel] for channel in range(3))
+    grey = (red.astype(np.uint16) + green + blue) // 3
+    grid = np.where(grey < half, BUILDING, EMPTY).astype(np.uint8)
+    grid[(red >= half) & (green < half) & (blue < half)] = HOSPITAL
+    return grid
+
+
+def encode(grid):
+    """RGB pixels for a grid: white empty cells, black buildings, red hospitals."""
+    palette = np.zeros((3, 3), dtype=np.uint8)
+    palette[EMPTY] = (255, 255, 255)
+    palette[BUILDING] = (0, 0, 0)
+    palette[HOSPITAL] = (255, 0, 0)
+    return palette[grid]
+
+
+def read_netpbm(path):
+    """Memory-map the pixels of a binary PGM or PPM; returns (pixels, maxval)."""
+    with open(path, 'rb') as file:
+        head = file.read(1024)
+
+    # Header fields are whitespace separated, with '#' comments to end of line
+    fields = []
+    position = 0
+    while len(fields) < 4:
+        while position < len(head) and head[position:position + 1].isspace():
+            position += 1
+        if head[position:position + 1] == b'#':
+            position = head.index(b'\n', position)
+            continue
+        end = position
+        while end < len(head) and not head[end:end + 1].isspace():
+            end += 1
+        if end == position:
+            raise ValueError(f"Truncated header in {path}")
+        fields.append(head[position:end])
+        position = end
+    # Exactly one whitespace byte separates the header from the pixels
+    position += 1
+
+    magic, width, height, maxval = fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+    if magic not in NETPBM_FORMATS.values():
+        raise ValueError(f"{path} is not a binary PGM or PPM")
+    if maxval > 255:
+        raise ValueError(f"{path} has 16-bit pixels; only 8-bit maps are supported")
+    shape = (height, width) if magic == b'P5' else (height, width, 3)
+    return np.memmap(path, dtype=np.uint8, mode='r', offset=position, shape=shape), maxval
+
+
+def write_netpbm(path, pixels):
+    magic = b'P5' if pixels.ndim == 2 else b'P6'
+    height, width = pixels.shape[:2]
+    with open(path, 'wb') as file:
+        file.write(b'%s\n%d %d\n255\n' % (magic, width, height))
+        file.write(np.ascontiguousarray(pixels, dtype=np.uint8).tobytes())
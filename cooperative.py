@@ -0,0 +1,314 @@
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+
+class ReservationTable:
+    """Space-time cell reservations keyed by ``step * cells + cell``.
+
+    ``owner`` maps a reserved (step, cell) key to the drone slot holding it,
+    so a lookup is one dict probe. Keys are also filed per step and per
+    drone: ``advance()`` drops whole past steps as drones move on, and
+    ``release()`` frees everything a drone holds when it replans or lands.
+    """
+
+    def __init__(self, grid_size):
+        self.cells = grid_size * grid_size
+        self.owner = {}
+        self.by_step = {}
+        self.by_drone = {}
+        self.oldest = 0
+
+    def __len__(self):
+        return len(self.owner)
+
+    def clear(self):
+        self.owner.clear()
+        self.by_step.clear()
+        self.by_drone.clear()
+        self.oldest = 0
+
+    def state(self):
+        """Arrays that fully describe the table, insertion order included."""
+        return {
+            'owner': np.array(list(self.owner.items()), dtype=np.int64).reshape(-1, 2),
+            'by_step': np.array([key for keys in self.by_step.values() for key in keys], dtype=np.int64),
+            'by_drone': np.array([(slot, key) for slot, keys in self.by_drone.items() for key in keys],
+                                 dtype=np.int64).reshape(-1, 2),
+            'oldest': np.array(self.oldest, dtype=np.int64),
+        }
+
+    def load_state(self, arrays):
+        self.clear()
+        self.owner.update(arrays['owner'].tolist())
+        for key in arrays['by_step'].tolist():
+            self.by_step.setdefault(key // self.cells, []).append(key)
+        for slot, key in arrays['by_drone'].tolist():
+            self.by_drone.setdefault(slot, []).append(key)
+        self.oldest = int(arrays['oldest'])
+
+    def reserve(self, slot, step, cell):
+        key = step * self.cells + cell
+        self.owner[key] = slot
+        self.by_drone.setdefault(slot, []).append(key)
+        self.by_step.setdefault(step, []).append(key)
+
+    def release(self, slot):
+        owner = self.owner
+        for key in self.by_drone.pop(slot, ()):
+            if owner.get(key) == slot:
+                del owner[key]
+
+    def advance(self, step):
+        """Forget every reservation for steps before ``step``."""
+        if not self.by_step:
+            self.oldest = step
+            return
+        owner = self.owner
+        while self.oldest < step:
+            for key in self.by_step.pop(self.oldest, ()):
+                owner.pop(key, None)
+            self.oldest += 1
+
+
+class CooperativePlanner:
+    """Windowed cooperative A* (WHCA*) over a shared reservation table.
+
+    Each plan searches (cell, step) space ``window`` move steps ahead. A
+    drone may move to a neighbour or wait, but not enter a cell another
+    drone reserved for that step, nor swap cells with one. The heuristic is
+    the true cost-to-go from the destination hospital's distance field,
+    which is the abstract, reservation-free layer of the hierarchy. The
+    windowed part of the path is reserved; the rest follows the distance
+    field unreserved. Drones replan every ``window // 2`` steps, so
+    reservations stay ahead of them. Hospital cells are shared launch pads
+    and are never reserved.
+
+    With the engine's ``use_forecast`` set, moves and waits are costed by
+    the forecast obstacle proximity at the moment the drone would be in the
+    cell (``forecast_weight`` per expected obstacle), and the window spans
+    the forecast horizon. Without ``use_cooperative`` nothing is reserved,
+    which leaves plain space-time planning around predicted obstacles.
+    """
+
+    def __init__(self, engine, window=16, obstacle_weight=2, forecast_weight=2, forecast_greed=1.5,
+                 max_expansions=20000):
+        self.engine = engine
+        self.window = window
+        self.obstacle_weight = obstacle_weight
+        self.forecast_weight = forecast_weight
+        self.forecast_greed = forecast_greed
+        self.max_expansions = max_expansions
+        self.table = ReservationTable(engine.grid_size)
+        self.plan_step = {}
+        self.expansions = 0
+        self.plans = 0
+
+    def clear(self):
+        self.table.clear()
+        self.plan_step.clear()
+
+    def state(self):
+        """Reservations and per-drone plan steps; neither can be rebuilt from the map."""
+        arrays = {f"table.{name}": array for name, array in self.table.state().items()}
+        arrays['plan_step'] = np.array(list(self.plan_step.items()), dtype=np.int64).reshape(-1, 2)
+        return arrays
+
+    def load_state(self, arrays):
+        table = {name[len('table.'):]: array for name, array in arrays.items() if name.startswith('table.')}
+        self.table.load_state(table)
+        self.plan_step = dict(arrays['plan_step'].tolist())
+
+    def release(self, slot):
+        self.table.release(slot)
+        self.plan_step.pop(slot, None)
+
+    def span(self):
+        """Move steps searched per plan."""
+        engine = self.engine
+        if engine.use_forecast:
+            return max(1, engine.forecast_horizon // engine.drone_move_interval)
+        return self.window
+
+    def due(self, slot, step):
+        """Whether the drone has used up half of its planned window."""
+        planned = self.plan_step.get(slot)
+        return planned is None or step - planned >= self.span() // 2
+
+    def expedite(self, slots, step, rounds=2):
+        """Make the drones due for a replan ``rounds`` move steps from ``step``."""
+        half = self.span() // 2
+        plan_step = self.plan_step
+        for slot in slots:
+            planned = plan_step.get(slot)
+            if planned is not None:
+                plan_step[slot] = min(planned, step + rounds - half)
+
+    def heuristic(self, goal):
+        engine = self.engine
+        n = engine.grid_size
+        if goal in engine.hospitals:
+            field = engine.distance_fields.field(goal)
+            field.refresh()
+            return field.dist.__getitem__, field
+        gx, gy = goal
+
+        def chebyshev(cell):
+            return max(abs(cell % n - gx), abs(cell // n - gy))
+        return chebyshev, None
+
+    def plan(self, slot, start_step):
+        """Plan from the drone's cell at ``start_step``; entry i is its cell at ``start_step + i``."""
+        engine = self.engine
+        drones = engine.drones
+        n = engine.grid_size
+        cells = n * n
+        table = self.table
+        table.release(slot)
+        self.plans += 1
+
+        sx, sy = drones.pos[slot].tolist()
+        goal = tuple(drones.destination[slot].tolist())
+        source = sy * n + sx
+        target = goal[1] * n + goal[0]
+        heuristic, field = self.heuristic(goal)
+        if heuristic(source) == INF:
+            return []
+
+        offsets, targets = engine.astar.adjacency(engine.grid)
+        proximity = engine.obstacle_field.proximity
+        shared = engine.hospital_mask()
+        owner = table.owner
+        reserve = engine.use_cooperative
+        weight = self.obstacle_weight
+        window = self.span()
+        forecasting = engine.use_forecast
+        if forecasting:
+            # Forecast proximity row for each step of the window
+            rows = engine.forecast.refresh()
+            interval = engine.drone_move_interval
+            ahead = start_step - engine.move_step
+            risk = [rows[engine.forecast.slice_at(max(0, (ahead + t) * interval))]
+                    for t in range(window + 1)]
+            weight = self.forecast_weight
+            greed = self.forecast_greed
+        else:
+            greed = 1
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        # Search nodes are (cell, parent node index); the heap holds
+        # (f, -t, g, cell, node) so equal-cost ties go deeper first
+        nodes = [(source, -1)]
+        best = {source: 0}
+        frontier = [(heuristic(source), 0, 0, source, 0)]
+        end = None
+        expansions = 0
+        while frontier:
+            _, t, g, cell, node = heappop(frontier)
+            t = -t
+            if cell == target or t == window:
+                end = node
+                break
+            expansions += 1
+            if expansions > self.max_expansions:
+                break
+
+            arrive = start_step + t + 1
+            arrive_key = arrive * cells
+            depart_key = arrive_key - cells
+            moves = [targets[i] for i in range(offsets[cell], offsets[cell + 1])]
+            moves.append(cell)
+            for nxt in moves:
+                if reserve and not shared[nxt]:
+                    holder = owner.get(arrive_key + nxt)
+                    if holder is not None and holder != slot:
+                        continue
+                    if nxt != cell:
+                        # Swapping cells with another drone is a collision too
+                        holder = owner.get(depart_key + nxt)
+                        if holder is not None and holder != slot and owner.get(arrive_key + cell) == holder:
+                            continue
+                if forecasting:
+                    if t == 0 and nxt != cell and proximity[nxt]:
+                        # The engine will not step next to an obstacle now
+                        continue
+                    cost = g + 1 + risk[t + 1][nxt] * weight
+                else:
+                    cost = g + 1 if nxt == cell else g + 1 + proximity[nxt] * weight
+                key = (t + 1) * cells + nxt
+                if cost >= best.get(key, INF):
+                    continue
+                remaining = heuristic(nxt)
+                if remaining == INF:
+                    continue
+                best[key] = cost
+                nodes.append((nxt, node))
+                heappush(frontier, (cost + remaining * greed, -t - 1, cost, nxt, len(nodes) - 1))
+        self.expansions += expansions
+
+        if end is None:
+            return []
+        route = []
+        while end > 0:
+            cell, end = nodes[end]
+            route.append(cell)
+        route.reverse()
+
+        if reserve:
+            if not shared[source]:
+                table.reserve(slot, start_step, source)
+            for t, cell in enumerate(route, 1):
+                if not shared[cell]:
+                    table.reserve(slot, start_step + t, cell)
+        self.plan_step[slot] = start_step
+
+        path = [(cell % n, cell // n) for cell in route]
+        last = route[-1] if route else source
+        if last != target:
+            last_cell = (last % n, last // n)
+            rest = field.path(last_cell) if field is not None else engine.find_path(last_cell, goal)
+            if not rest:
+                return path if path else []
+            path.extend(rest)
+        return path
+
+    def resolve_conflicts(self, here, there, stalled, parked=()):
+        """Hold back movers that would still collide; returns the updated stalled mask.
+
+        ``here`` and ``there`` are the flat current and next cells of the
+        drones about to step, ``parked`` the cells of drones with nowhere to
+        go. Reservations cover each drone's window, but a drone that stalls,
+        or a path past its window, can still meet another. A mover is held
+        if its next cell is taken by a drone staying put, already claimed by
+        another mover, or if the two would swap. Holding a drone can block
+        the one behind it, so this repeats until nothing changes.
+        """
+        shared = self.engine.hospital_mask()
+        stalled = stalled.copy()
+        parked = {cell for cell in parked if not shared[cell]}
+        changed = True
+        while changed:
+            changed = False
+            taken = set(parked)
+            taken.update(here[i] for i in range(len(here))
+                         if (stalled[i] or there[i] == here[i]) and not shared[here[i]])
+            arriving = {}
+            leaving = {}
+            for i in range(len(here)):
+                if stalled[i]:
+                    continue
+                cell = there[i]
+                if cell == here[i] or shared[cell]:
+                    continue
+                other = leaving.get(cell)
+                swap = other is not None and there[other] == here[i]
+                if cell in taken or cell in arriving or swap:
+                    stalled[i] = True
+                    changed = True
+                    continue
+                arriving[cell] = i
+                leaving[here[i]] = i
+        return stalled
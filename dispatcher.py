@@ -0,0 +1,185 @@
+from collections import deque
+
+import numpy as np
+
+INF = float('inf')
+
+
+def min_cost_assignment(costs):
+    """Minimum-cost assignment for a (rows, cols) cost matrix with rows <= cols.
+
+    Hungarian algorithm with row/column potentials, O(rows^2 * cols).
+    Returns ``assigned`` where ``assigned[row]`` is the column given to that
+    row. Forbidden pairs should carry a large finite cost and be filtered
+    by the caller.
+    """
+    rows, cols = costs.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    owner = np.zeros(cols + 1, dtype=np.int64)  # 1-based row matched to each column
+    way = np.zeros(cols + 1, dtype=np.int64)
+
+    for row in range(1, rows + 1):
+        owner[0] = row
+        col = 0
+        min_slack = np.full(cols + 1, INF)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current = owner[col]
+            slack = costs[current - 1] - u[current] - v[1:]
+            free = ~used[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = col
+            candidates = np.where(free, min_slack[1:], INF)
+            nxt = int(np.argmin(candidates)) + 1
+            delta = candidates[nxt - 1]
+
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_slack[1:][free] -= delta
+            col = nxt
+            if owner[col] == 0:
+                break
+        while col:
+            prev = way[col]
+            owner[col] = owner[prev]
+            col = prev
+
+    assigned = np.full(rows, -1, dtype=np.int64)
+    for col in range(1, cols + 1):
+        if owner[col]:
+            assigned[owner[col] - 1] = col - 1
+    return assigned
+
+
+class Dispatcher:
+    """Assigns pending hospital needs to supplying hospitals at minimum travel cost.
+
+    Hospital-to-hospital travel costs (flight steps around buildings) come
+    from one breadth-first search per hospital over the planner's CSR
+    adjacency, cached until the building layout or the set of hospitals
+    changes. Each dispatch round collects every need not already served by
+    a drone in flight, expands each hospital into one column per free
+    launch slot (``capacity`` drones at a time), and solves the assignment.
+    A non-specialist origin pays ``generalist_penalty`` extra steps, and
+    higher production rates win ties between specialists.
+    """
+
+    def __init__(self, engine, capacity=3, generalist_penalty=None):
+        self.engine = engine
+        self.capacity = capacity
+        self.generalist_penalty = generalist_penalty
+        self.key = None
+        self.index = {}
+        self.matrix = None
+        self.rebuilds = 0
+        self.dispatched = 0
+
+    def travel_costs(self):
+        """Return ({hospital pos: index}, (h, h) step-count matrix), rebuilt if stale."""
+        engine = self.engine
+        positions = tuple(engine.hospitals)
+        key = (engine.map_version, positions)
+        if key != self.key:
+            self.index = {pos: i for i, pos in enumerate(positions)}
+            self.matrix = self.build_matrix(positions)
+            self.key = key
+            self.rebuilds += 1
+        return self.index, self.matrix
+
+    def build_matrix(self, positions):
+        engine = self.engine
+        n = engine.grid_size
+        offsets, targets = engine.astar.adjacency(engine.grid)
+        cells = [y * n + x for x, y in positions]
+        matrix = np.full((len(cells), len(cells)), INF)
+        for i, source in enumerate(cells):
+            steps = {source: 0}
+            queue = deque([source])
+            while queue:
+                cell = queue.popleft()
+                step = steps[cell] + 1
+                for k in range(offsets[cell], offsets[cell + 1]):
+                    nxt = targets[k]
+                    if nxt not in steps:
+                        steps[nxt] = step
+                        queue.append(nxt)
+            for j, target in enumerate(cells):
+                if target in steps:
+                    matrix[i, j] = steps[target]
+        return matrix
+
+    def pending_needs(self):
+        """(destination pos, supply) pairs with no drone already on the way."""
+        drones = self.engine.drones
+        in_flight = set()
+        for slot in drones.slots().tolist():
+            destination = tuple(drones.destination[slot].tolist())
+            in_flight.add((destination, drones.supply_types[slot]))
+        return [(pos, supply)
+                for pos, hospital in self.engine.hospitals.items()
+                for supply in hospital['needs']
+                if (pos, supply) not in in_flight]
+
+    def plan(self, limit=None):
+        """Return up to ``limit`` (origin pos, destination pos, supply) assignments, cheapest first."""
+        engine = self.engine
+        hospitals = engine.hospitals
+        needs = self.pending_needs()
+        origins = [pos for pos, hospital in hospitals.items()
+                   for _ in range(max(0, self.capacity - hospital['drones']))]
+        if not needs or not origins:
+            return []
+
+        index, matrix = self.travel_costs()
+        penalty = self.generalist_penalty
+        if penalty is None:
+            penalty = engine.grid_size
+        max_production = max(supply['production'] for supply in engine.possible_supplies.values())
+
+        costs = np.full((len(needs), len(origins)), INF)
+        for row, (dest, supply) in enumerate(needs):
+            travel = matrix[:, index[dest]]
+            for col, origin in enumerate(origins):
+                if origin == dest:
+                    continue
+                steps = travel[index[origin]]
+                production = hospitals[origin]['specialties'].get(supply)
+                if production is None:
+                    steps += penalty
+                else:
+                    steps += (max_production - production) / (max_production + 1)
+                costs[row, col] = steps
+
+        # Forbidden pairs get a cost larger than any real one so the solver
+        # stays finite; they are dropped from the result afterwards
+        feasible = np.isfinite(costs)
+        if not feasible.any():
+            return []
+        big = costs[feasible].max() * len(needs) + 1
+        solver_costs = np.where(feasible, costs, big)
+        if len(needs) <= len(origins):
+            assigned = min_cost_assignment(solver_costs)
+            pairs = [(row, col) for row, col in enumerate(assigned.tolist()) if col >= 0]
+        else:
+            assigned = min_cost_assignment(solver_costs.T)
+            pairs = [(row, col) for col, row in enumerate(assigned.tolist()) if row >= 0]
+
+        pairs = [(costs[row, col], origins[col], needs[row][0], needs[row][1])
+                 for row, col in pairs if feasible[row, col]]
+        pairs.sort(key=lambda pair: pair[0])
+        if limit is not None:
+            pairs = pairs[:limit]
+        return [(origin, dest, supply) for _, origin, dest, supply in pairs]
+
+    def dispatch(self, limit=None):
+        """Launch drones for the cheapest assignments; returns how many were sent."""
+        engine = self.engine
+        sent = 0
+        for origin, dest, supply in self.plan(limit):
+            engine.create_new_drone(engine.hospitals[origin], origin, engine.hospitals[dest], dest, supply)
+            sent += 1
+        self.dispatched += sent
+        return sent
@@ -0,0 +1,218 @@
+import heapq
+
+INF = float('inf')
+
+
+class DistanceField:
+    """Cost-to-go from every cell to one hospital (a reverse Dijkstra field).
+
+    ``dist[i]`` is the cheapest cost of flying from flat cell ``i`` to the
+    goal, where entering a cell costs ``1 + 2 * obstacle proximity`` as in
+    ``find_path()``. A drone routes by repeatedly stepping to the neighbour
+    minimising ``cost + dist``. The field is brought up to date lazily on
+    use: obstacle cost changes are repaired in place, while building edits
+    (a new static map version) or very large change sets trigger a rebuild.
+    """
+
+    def __init__(self, engine, goal, obstacle_weight=2, rebuild_fraction=0.25):
+        self.engine = engine
+        self.goal = goal
+        self.obstacle_weight = obstacle_weight
+        self.rebuild_fraction = rebuild_fraction
+
+        self.dist = None
+        self.costs = None
+        self.map_version = None
+        self.cursor = None
+        self.rebuilds = 0
+        self.repairs = 0
+
+    def cell_costs(self):
+        proximity = self.engine.obstacle_field.proximity
+        weight = self.obstacle_weight
+        return [1 + p * weight for p in proximity]
+
+    def rebuild(self):
+        engine = self.engine
+        n = engine.grid_size
+        offsets, targets = engine.astar.adjacency(engine.grid)
+        self.map_version = engine.map_version
+        self.cursor = engine.cost_log.epoch
+        self.costs = costs = self.cell_costs()
+        self.dist = dist = [INF] * (n * n)
+        self.rebuilds += 1
+
+        gx, gy = self.goal
+        goal = gy * n + gx
+        if not engine.is_valid_move(gx, gy):
+            return
+        dist[goal] = 0
+        frontier = [(0, goal)]
+        self._propagate(frontier, offsets, targets)
+
+    def _propagate(self, frontier, offsets, targets):
+        dist = self.dist
+        costs = self.costs
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        while frontier:
+            d, cell = heappop(frontier)
+            if d != dist[cell]:
+                continue
+            # Neighbours reach the goal through this cell by paying its cost
+            through = d + costs[cell]
+            for i in range(offsets[cell], offsets[cell + 1]):
+                nxt = targets[i]
+                if through < dist[nxt]:
+                    dist[nxt] = through
+                    heappush(frontier, (through, nxt))
+
+    def changed_cells(self, entries):
+        n = self.engine.grid_size
+        cells = set()
+        for x, y, radius in set(entries):
+            for cy in range(max(0, y - radius), min(n - 1, y + radius) + 1):
+                row = cy * n
+                cells.update(range(row + max(0, x - radius), row + min(n - 1, x + radius) + 1))
+        return cells
+
+    def repair(self, cells):
+        engine = self.engine
+        n = engine.grid_size
+        offsets, targets = engine.astar.adjacency(engine.grid)
+        dist = self.dist
+        costs = self.costs
+        proximity = engine.obstacle_field.proximity
+        weight = self.obstacle_weight
+        goal = self.goal[1] * n + self.goal[0]
+
+        old_costs = {}
+        for cell in cells:
+            new = 1 + proximity[cell] * weight
+            if new != costs[cell]:
+                old_costs[cell] = costs[cell]
+                costs[cell] = new
+        if not old_costs:
+            return
+        self.repairs += 1
+
+        # Raise: collect every cell whose best route ran through a cell that
+        # got more expensive, following the dependency chain outwards
+        raised = set()
+        stack = []
+        for cell, old in old_costs.items():
+            if costs[cell] > old and dist[cell] < INF:
+                through = old + dist[cell]
+                for i in range(offsets[cell], offsets[cell + 1]):
+                    nxt = targets[i]
+                    if nxt != goal and nxt not in raised and dist[nxt] == through:
+                        raised.add(nxt)
+                        stack.append(nxt)
+        while stack:
+            cell = stack.pop()
+            through = old_costs.get(cell, costs[cell]) + dist[cell]
+            for i in range(offsets[cell], offsets[cell + 1]):
+                nxt = targets[i]
+                if nxt != goal and nxt not in raised and dist[nxt] == through:
+                    raised.add(nxt)
+                    stack.append(nxt)
+
+        for cell in raised:
+            dist[cell] = INF
+
+        # Lower: reseed raised cells from their settled neighbours and relax
+        # around cells that got cheaper, then let Dijkstra settle the rest
+        frontier = []
+        for cell in raised:
+            best = INF
+            for i in range(offsets[cell], offsets[cell + 1]):
+                nxt = targets[i]
+                candidate = costs[nxt] + dist[nxt]
+                if candidate < best:
+                    best = candidate
+            if best < INF:
+                dist[cell] = best
+                frontier.append((best, cell))
+        for cell, old in old_costs.items():
+            if costs[cell] < old and dist[cell] < INF:
+                through = costs[cell] + dist[cell]
+                for i in range(offsets[cell], offsets[cell + 1]):
+                    nxt = targets[i]
+                    if through < dist[nxt]:
+                        dist[nxt] = through
+                        frontier.append((through, nxt))
+        heapq.heapify(frontier)
+        self._propagate(frontier, offsets, targets)
+
+    def refresh(self):
+        """Bring the field up to date with the current map and obstacle costs."""
+        engine = self.engine
+        if self.dist is None or self.map_version != engine.map_version:
+            self.rebuild()
+            return
+        if self.cursor == engine.cost_log.epoch:
+            return
+
+        entries = engine.cost_log.since(self.cursor)
+        if entries is None:
+            self.rebuild()
+            return
+        cells = self.changed_cells(entries)
+        if len(cells) > self.rebuild_fraction * len(self.dist):
+            self.rebuild()
+            return
+        self.cursor = engine.cost_log.epoch
+        self.repair(cells)
+
+    def path(self, start):
+        """Descend the field from start; returns cells excluding start, or []."""
+        self.refresh()
+        engine = self.engine
+        n = engine.grid_size
+        offsets, targets = engine.astar.adjacency(engine.grid)
+        dist = self.dist
+        costs = self.costs
+
+        sx, sy = start
+        if not (0 <= sx < n and 0 <= sy < n):
+            return []
+        cell = sy * n + sx
+        goal = self.goal[1] * n + self.goal[0]
+        if dist[cell] == INF:
+            return []
+
+        path = []
+        while cell != goal and len(path) < len(dist):
+            best = None
+            best_cost = INF
+            for i in range(offsets[cell], offsets[cell + 1]):
+                nxt = targets[i]
+                candidate = costs[nxt] + dist[nxt]
+                if candidate < best_cost:
+                    best, best_cost = nxt, candidate
+            if best is None:
+                return []
+            cell = best
+            path.append((cell % n, cell // n))
+        return path if cell == goal else []
+
+
+class DistanceFields:
+    """Lazily built distance fields, one per destination hospital."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.fields = {}
+
+    def clear(self):
+        self.fields.clear()
+
+    def field(self, goal):
+        field = self.fields.get(goal)
+        if field is None:
+            field = DistanceField(self.engine, goal)
+            self.fields[goal] = field
+        return field
+
+    def path(self, start, goal):
+        return self.field(goal).path(start)
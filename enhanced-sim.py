@@ -1,21 +1,30 @@
 import pygame
-import random
-import csv
-from queue import PriorityQueue
-from datetime import datetime
-import threading
-import time
-import math
+import numpy as np
+
+from sim_engine import (
+    SimulationEngine, GRID_SIZE, TICK_RATE, BUILDING,
+    EFFECT_HOSPITAL_ADDED, EFFECT_OBSTACLE_CROSSING, EFFECT_DELIVERY,
+)
+from city_map import load_map
+from particles import ParticlePool
+from sim_clock import SimClock
+from profiler import TickProfiler
 
 # Initialize Pygame
 pygame.init()
 pygame.font.init()
 
 # Constants
-GRID_SIZE = 25
 WINDOW_SIZE = 700
-CELL_SIZE = WINDOW_SIZE // GRID_SIZE
+CELL_SIZE = WINDOW_SIZE // GRID_SIZE  # particle effects are sized in pixels of this zoom
+DETAIL_SCALE = 4  # pixels per cell below which the map is drawn as a density image
+MAX_SCALE = 128
 TOTAL_HEIGHT = WINDOW_SIZE + 100
+FPS = 60
+FAST_FORWARD_REDRAW = 0.5  # seconds between frames while fast-forwarding
+GRID_RECT = pygame.Rect(0, 0, WINDOW_SIZE, WINDOW_SIZE)
+BUTTON_BAR_RECT = pygame.Rect(0, WINDOW_SIZE, WINDOW_SIZE, TOTAL_HEIGHT - WINDOW_SIZE)
+DASHBOARD_RECT = pygame.Rect(WINDOW_SIZE, 0, 300, TOTAL_HEIGHT)
 
 # Modern Color Palette
 BLACK = (34, 40, 49)
@@ -30,15 +39,114 @@ PATH_COLOR = (236, 240, 241)
 ALERT_COLOR = (242, 153, 74)
 BG_COLOR = (248, 250, 252)
 
-# Entity types
-EMPTY = 0
-HOSPITAL = 1
-BUILDING = 2
-DRONE = 3
-OBSTACLE = 4
+# Pixel offsets covered by one particle dot (a radius-2 disc)
+PARTICLE_DOT = np.array([(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+                         if dx * dx + dy * dy <= 4], dtype=np.int32)
+
+# Arrow keys pan the map a quarter of the view at a time
+PAN_KEYS = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+}
+
+EFFECT_COLORS = {
+    EFFECT_HOSPITAL_ADDED: GREEN,
+    EFFECT_OBSTACLE_CROSSING: BLUE,
+    EFFECT_DELIVERY: GREEN,
+}
+
+
+class Camera:
+    """The part of the grid shown in the map view.
+
+    ``scale`` is pixels per cell and (``x``, ``y``) the grid position, in
+    cells, of the view's top-left corner. Zoom goes in factors of two,
+    from the whole grid up to ``MAX_SCALE``. At ``DETAIL_SCALE`` and above
+    the scale is a whole number of pixels, so cells tile without seams.
+    The view never leaves the grid, and a grid smaller than the view is
+    centred in it.
+    """
+
+    def __init__(self, grid_size, view_size):
+        self.grid_size = grid_size
+        self.view_size = view_size
+        self.fit = self.snap(view_size / grid_size)
+        self.reset()
+
+    @staticmethod
+    def snap(scale):
+        return scale if scale < DETAIL_SCALE else float(int(scale))
+
+    def reset(self):
+        self.scale = self.fit
+        self.x = self.y = 0.0
+        self.clamp()
+
+    @property
+    def detailed(self):
+        return self.scale >= DETAIL_SCALE
+
+    @property
+    def cell(self):
+        """Whole pixels per cell, for tiles and sprites."""
+        return max(1, int(self.scale))
+
+    def clamp(self):
+        span = self.view_size / self.scale
+        limit = self.grid_size - span
+        if limit < 0:
+            self.x = self.y = limit / 2
+        else:
+            self.x = min(max(self.x, 0.0), limit)
+            self.y = min(max(self.y, 0.0), limit)
+
+    def origin(self):
+        """Pixel offset of the view in grid pixels at the current scale."""
+        return round(self.x * self.scale), round(self.y * self.scale)
+
+    def visible(self):
+        """Inclusive-exclusive (x0, y0, x1, y1) cell bounds of what is on screen."""
+        span = self.view_size / self.scale
+        n = self.grid_size
+        return (max(0, int(self.x)), max(0, int(self.y)),
+                min(n, int(self.x + span) + 1), min(n, int(self.y + span) + 1))
+
+    def to_screen(self, x, y):
+        ox, oy = self.origin()
+        return round(x * self.scale) - ox, round(y * self.scale) - oy
+
+    def to_cell(self, px, py):
+        ox, oy = self.origin()
+        return int((px + ox) // self.scale), int((py + oy) // self.scale)
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels."""
+        self.x += dx / self.scale
+        self.y += dy / self.scale
+        self.clamp()
+
+    def zoom(self, factor, around):
+        """Scale by ``factor``, keeping the point under pixel ``around`` in place; returns whether it changed."""
+        scale = self.snap(min(max(self.scale * factor, self.fit), max(self.fit, MAX_SCALE)))
+        if scale == self.scale:
+            return False
+        px, py = around
+        ox, oy = self.origin()
+        wx, wy = (px + ox) / self.scale, (py + oy) / self.scale
+        self.scale = scale
+        self.x = wx - px / scale
+        self.y = wy - py / scale
+        self.clamp()
+        return True
+
 
 class EnhancedGridSim:
-    def __init__(self):
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else SimulationEngine()
+        self.engine.on_effect = self.handle_effect
+
         self.screen = pygame.display.set_mode((WINDOW_SIZE + 300, TOTAL_HEIGHT))
         pygame.display.set_caption("Grid Simulation")
         
@@ -50,53 +158,42 @@ class EnhancedGridSim:
             self.small_font = pygame.font.SysFont('Arial', 16)
         
         # Initialize components
-        self.grid = [[EMPTY for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.hospitals = {}
-        self.buildings = set()
-        self.drones = []
-        self.moving_obstacles = []
-        self.particle_systems = []
-        
-        # Hospital supplies and needs
-        self.possible_supplies = {
-            'Medical': {'production': 10, 'consumption': 5},
-            'Blood': {'production': 8, 'consumption': 4},
-            'Equipment': {'production': 5, 'consumption': 3},
-            'Supplies': {'production': 7, 'consumption': 4}
-        }
-        
-        self.possible_needs = list(self.possible_supplies.keys())
-        
-        # Stats tracking
-        self.total_deliveries = 0
-        self.active_routes = 0
-        self.emergency_count = 0
+        self.particles = ParticlePool()
+        # Particles are stamped into one layer and blitted in a single call
+        self.particle_layer = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+        self.particle_bounds = None
+
+        # Pan and zoom; every draw pass is culled to the visible cells
+        self.camera = Camera(self.engine.grid_size, WINDOW_SIZE)
+        self.pan_anchor = None
+
+        # Grid, buildings and hospitals in view pre-rendered once per map
+        # edit or camera move; each frame only the cells moving entities
+        # covered are restored from it
+        self.static_layer = None
+        self.dirty_rects = []
+
+        # Zoomed out, buildings shaded by density per block of cells,
+        # rendered when the map or the view changes
+        self.density_base = None
+        self.density_key = None
+
+        # Pre-built sprites so each entity or trail cell is a single blit,
+        # and one overlay shared by every drone's path
+        self.sprites = {}
+        self.path_overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+        self.path_overlay_cells = []
         
         # State management
         self.edit_mode = True
-        self.simulation_running = False
         self.selected_type = None
-        self.active_hospital_drones = set()
-        
-        # Timing controls
-        self.drone_move_timer = 0
-        self.drone_move_interval = 2
-        self.obstacle_spawn_timer = 0
-        self.obstacle_spawn_interval = 4
-        self.obstacle_move_timer = 0
-        self.obstacle_move_interval = 6
-        self.max_obstacles = 200
+
+        # Sim ticks are paced by real time, independent of the frame rate
+        self.sim_clock = SimClock(TICK_RATE)
         
         # Setup
         self.setup_ui()
-        self.alert_file = "simulation_alerts.csv"
-        self.create_alert_file()
-        self.alert_thread = None
         self.running = True
-        self.deploy_count = 1
-        self.deploy_active = False
-        self.deploy_timer = 0
-        self.deploy_interval = 60  # 1 second at 60 FPS
         self.dashboard_scroll_y = 0  # Tracks the scroll position
         self.dashboard_height = TOTAL_HEIGHT
 
@@ -134,82 +231,8 @@ class EnhancedGridSim:
             label = self.font.render(text, True, WHITE)
             self.button_labels[name] = label
 
-    def create_alert_file(self):
-        with open(self.alert_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['ID', 'Timestamp', 'Type', 'Origin', 'Destination', 'Status'])
-
-    def process_alerts(self):
-        if not hasattr(self, 'alert_file') or not self.alert_file:
-            return
-            
-        try:
-            with open(self.alert_file, 'r') as file:
-                reader = csv.DictReader(file)
-                alerts = list(reader)
-            
-            for alert in alerts:
-                if (not any(d['id'] == alert['ID'] for d in self.drones) and 
-                    alert['Status'] == 'Active'):
-                    origin_hospital = None
-                    dest_hospital = None
-                    
-                    for pos, hospital in self.hospitals.items():
-                        if hospital['id'] == alert['Origin']:
-                            origin_hospital = pos
-                        if hospital['id'] == alert['Destination']:
-                            dest_hospital = pos
-                    
-                    if origin_hospital and dest_hospital:
-                        self.drones.append({
-                            'id': alert['ID'],
-                            'pos': origin_hospital,
-                            'origin_hospital': alert['Origin'],
-                            'destination': dest_hospital,
-                            'path': self.find_path(origin_hospital, dest_hospital),
-                            'type': alert['Type'],
-                            'trail': []
-                        })
-        except (FileNotFoundError, KeyError, csv.Error) as e:
-            print(f"Error processing alerts: {e}")
-
-    def generate_alerts(self):
-        alert_id = 1
-        while self.simulation_running:
-            if len(self.hospitals) >= 2:
-                available_hospitals = []
-                destination_hospitals = []
-                
-                for pos, hospital in self.hospitals.items():
-                    if hospital['drones'] < 3:
-                        available_hospitals.append((pos, hospital))
-                    if hospital['needs']:
-                        destination_hospitals.append((pos, hospital))
-                
-                if available_hospitals and destination_hospitals:
-                    origin_pos, origin_hospital = random.choice(available_hospitals)
-                    dest_pos, dest_hospital = random.choice(destination_hospitals)
-                    
-                    if origin_pos != dest_pos:
-                        supply_type = random.choice(list(dest_hospital['needs'].keys()))
-                        self.create_new_drone(origin_hospital, origin_pos, dest_hospital, dest_pos, supply_type)
-                        alert_id += 1
-                
-                time.sleep(random.randint(2, 4))
-
-    def create_new_drone(self, origin_hospital, origin_pos, dest_hospital, dest_pos, supply_type):
-        drone_id = f"D{len(self.drones) + 1}"
-        self.drones.append({
-            'id': drone_id,
-            'pos': origin_pos,
-            'origin_hospital': origin_hospital['id'],
-            'destination': dest_pos,
-            'path': self.find_path(origin_pos, dest_pos),
-            'type': supply_type,
-            'trail': []
-        })
-        origin_hospital['drones'] += 1
-        self.active_routes += 1
+    def handle_effect(self, kind, pos):
+        self.add_particle_system(pos, EFFECT_COLORS.get(kind, WHITE))
 
     def create_glow_effect(self, radius, color):
         size = radius * 2
@@ -221,358 +244,386 @@ class EnhancedGridSim:
         
         return surface
 
+    def sprite(self, key):
+        """Return the cached sprite for ``key``, building it on first use.
+
+        Keys are ``('drone',)``, ``('obstacle', see_through)`` and
+        ``('trail', color, alpha)``.
+        """
+        surface = self.sprites.get(key)
+        if surface is None:
+            surface = self.build_sprite(key)
+            self.sprites[key] = surface
+        return surface
+
+    def build_sprite(self, key):
+        kind = key[0]
+        size = self.camera.cell
+        if kind == 'drone':
+            # Glow with the drone tile at its centre, offset by half a cell
+            surface = self.create_glow_effect(size, RED)
+            rect = pygame.Rect(size // 2, size // 2, size, size)
+            pygame.draw.rect(surface, RED, rect)
+            pygame.draw.rect(surface, (235, 87, 87), rect, 2)
+            return surface.convert_alpha()
+        if kind == 'obstacle':
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            if key[1]:
+                pygame.draw.rect(surface, (*BLUE, 128), surface.get_rect())
+            else:
+                pygame.draw.rect(surface, BLUE, surface.get_rect())
+                pygame.draw.rect(surface, (98, 155, 245), surface.get_rect(), 2)
+            return surface.convert_alpha()
+        _, color, alpha = key
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (*color, alpha), surface.get_rect())
+        return surface.convert_alpha()
+
     def add_particle_system(self, pos, color):
-        particles = [self.create_particle(pos) for _ in range(20)]
-        self.particle_systems.append({
-            'pos': pos,
-            'particles': particles,
-            'color': color,
-            'lifetime': 30
-        })
-
-    def create_particle(self, pos):
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(0.5, 2.0)
-        dx = speed * math.cos(angle)
-        dy = speed * math.sin(angle)
-        return {
-            'pos': [pos[0] * CELL_SIZE + CELL_SIZE/2, pos[1] * CELL_SIZE + CELL_SIZE/2],
-            'vel': [dx, dy],
-            'life': random.randint(20, 40)
-        }
+        self.particles.emit(pos[0] * CELL_SIZE + CELL_SIZE/2, pos[1] * CELL_SIZE + CELL_SIZE/2, color)
 
     def update_particles(self):
-        for system in self.particle_systems[:]:
-            for particle in system['particles'][:]:
-                particle['pos'][0] += particle['vel'][0]
-                particle['pos'][1] += particle['vel'][1]
-                particle['life'] -= 1
-                
-                if particle['life'] <= 0:
-                    system['particles'].remove(particle)
-            
-            system['lifetime'] -= 1
-            if system['lifetime'] <= 0 or not system['particles']:
-                self.particle_systems.remove(system)
+        self.particles.update()
 
-    def update_drones(self):
-        self.drone_move_timer += 1
-        if self.drone_move_timer < self.drone_move_interval:
-            return
-        
-        self.drone_move_timer = 0
-        
-        for drone in self.drones[:]:
-            if not drone['path']:
-                continue
-                
-            next_pos = drone['path'][0]
-            current_pos = drone['pos']
-            
-            if self.check_obstacle_proximity(next_pos):
-                new_path = self.find_safe_path(current_pos, drone['destination'])
-                if new_path:
-                    drone['path'] = new_path
-                continue
-            
-            if self.is_valid_move(*next_pos):
-                x, y = current_pos
-                next_x, next_y = next_pos
-                dx = max(-1, min(1, next_x - x))
-                dy = max(-1, min(1, next_y - y))
-                new_pos = (x + dx, y + dy)
-                
-                drone['trail'].append(drone['pos'])
-                if len(drone['trail']) > 10:
-                    drone['trail'].pop(0)
-                
-                drone['pos'] = new_pos
-                
-                if new_pos == next_pos:
-                    drone['path'].pop(0)
-                
-                if new_pos == drone['destination']:
-                    self.complete_delivery(drone)
-            else:
-                new_path = self.find_safe_path(current_pos, drone['destination'])
-                if new_path:
-                    drone['path'] = new_path
+    def draw_particles(self):
+        layer = self.particle_layer
+        if self.particle_bounds is not None:
+            layer.fill((0, 0, 0, 0), self.particle_bounds)
+            self.particle_bounds = None
 
-    def update_moving_obstacles(self):
-        self.obstacle_move_timer += 1
-        if self.obstacle_move_timer < self.obstacle_move_interval:
-            return
-        
-        self.obstacle_move_timer = 0
-        
-        self.obstacle_spawn_timer += 1
-        if (self.obstacle_spawn_timer >= self.obstacle_spawn_interval and 
-            len(self.moving_obstacles) < self.max_obstacles):
-            for _ in range(3):
-                self.spawn_moving_obstacle()
-            self.obstacle_spawn_timer = 0
-        
-        for obstacle in self.moving_obstacles[:]:
-            x, y = map(int, obstacle['pos'])
-            dx, dy = obstacle['direction']
-            
-            obstacle['trail'].append((x, y))
-            if len(obstacle['trail']) > 5:
-                obstacle['trail'].pop(0)
-            
-            if random.random() < 0.15:
-                if random.random() < 0.5:
-                    dx = random.choice([-1, 1])
-                    dy = 0
-                else:
-                    dx = 0
-                    dy = random.choice([-1, 1])
-                obstacle['direction'] = (dx, dy)
-            
-            new_x = x + dx
-            new_y = y + dy
-            
-            if not (0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE):
-                self.moving_obstacles.remove(obstacle)
-                continue
-            
-            obstacle['pos'] = (new_x, new_y)
-            obstacle['transparent'] = self.grid[new_y][new_x] == HOSPITAL
-            
-            if obstacle['transparent']:
-                self.add_particle_system((new_x, new_y), BLUE)
-
-    def spawn_moving_obstacle(self):
-        if random.random() < 0.5:
-            x = random.choice([0, GRID_SIZE-1])
-            y = random.randint(0, GRID_SIZE-1)
-            dx = 1 if x == 0 else -1
-            dy = 0
-        else:
-            x = random.randint(0, GRID_SIZE-1)
-            y = random.choice([0, GRID_SIZE-1])
-            dx = 0
-            dy = 1 if y == 0 else -1
-        
-        self.moving_obstacles.append({
-            'pos': (x, y),
-            'direction': (dx, dy),
-            'transparent': False,
-            'trail': []
-        })
-
-    def find_path(self, start, end):
-        frontier = PriorityQueue()
-        frontier.put((0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        while not frontier.empty():
-            current = frontier.get()[1]
-            if current == end:
-                break
-
-            for next_pos in self.get_neighbors(current):
-                obstacle_cost = self.check_obstacle_proximity(next_pos) * 2
-                new_cost = cost_so_far[current] + 1 + obstacle_cost
-                
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.heuristic(end, next_pos)
-                    frontier.put((priority, next_pos))
-                    came_from[next_pos] = current
-
-        if end not in came_from:
+        positions, colors, alphas = self.particles.active()
+        if not len(positions):
             return []
-            
-        path = []
-        current = end
-        while current != start:
-            path.append(current)
-            current = came_from[current]
-        path.reverse()
-        return path
-
-    def get_neighbors(self, pos):
-        neighbors = []
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0),
-                       (1, 1), (-1, 1), (1, -1), (-1, -1)]:
-            new_x, new_y = pos[0] + dx, pos[1] + dy
-            if self.is_valid_move(new_x, new_y):
-                neighbors.append((new_x, new_y))
-        return neighbors
-
-    def heuristic(self, a, b):
-        return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
-
-    def check_obstacle_proximity(self, pos, radius=2):
-        x, y = pos
-        count = 0
-        for obstacle in self.moving_obstacles:
-            obs_x, obs_y = map(int, obstacle['pos'])
-            if abs(obs_x - x) <= radius and abs(obs_y - y) <= radius:
-                count += 1
-        return count
-
-    def is_valid_move(self, x, y):
-        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
-            return False
-        return self.grid[y][x] != BUILDING
+
+        # Stamp every particle's dot into the layer with array writes
+        camera = self.camera
+        centers = (positions * (camera.scale / CELL_SIZE) - camera.origin()).astype(np.int32)
+        xs = (centers[:, 0, None] + PARTICLE_DOT[:, 0]).ravel()
+        ys = (centers[:, 1, None] + PARTICLE_DOT[:, 1]).ravel()
+        inside = (xs >= 0) & (xs < WINDOW_SIZE) & (ys >= 0) & (ys < WINDOW_SIZE)
+        if not inside.any():
+            return []
+        owner = np.repeat(np.arange(len(centers)), len(PARTICLE_DOT))[inside]
+        xs = xs[inside]
+        ys = ys[inside]
+        pixels = pygame.surfarray.pixels3d(layer)
+        pixels[xs, ys] = colors[owner]
+        del pixels
+        alpha = pygame.surfarray.pixels_alpha(layer)
+        alpha[xs, ys] = alphas[owner]
+        del alpha
+
+        x0, y0 = int(xs.min()), int(ys.min())
+        bounds = pygame.Rect(x0, y0, int(xs.max()) - x0 + 1, int(ys.max()) - y0 + 1)
+        self.particle_bounds = bounds
+        return [self.screen.blit(layer, bounds, bounds)]
 
     def handle_click(self, pos):
-        x, y = pos[0] // CELL_SIZE, pos[1] // CELL_SIZE
-        
-        if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE and self.edit_mode and self.selected_type:
-            if self.grid[y][x] == EMPTY:
-                if self.selected_type == 'building':
-                    self.grid[y][x] = BUILDING
-                    self.buildings.add((x, y))
+        x, y = self.camera.to_cell(*pos)
+
+        if self.edit_mode and self.selected_type:
+            if self.selected_type == 'building':
+                if self.engine.add_building(x, y):
+                    self.invalidate_static_layer()
                     print(f"Building added at ({x}, {y})")  # Debug print
-                elif self.selected_type == 'hospital':
-                    hospital_id = f"H{len(self.hospitals) + 1}"
-                    specialties = random.sample(list(self.possible_supplies.keys()), 2)
-                    needs = random.sample([s for s in self.possible_supplies.keys() if s not in specialties], 2)
-                    
-                    self.hospitals[(x, y)] = {
-                        'id': hospital_id,
-                        'specialties': {s: self.possible_supplies[s]['production'] for s in specialties},
-                        'needs': {n: 0 for n in needs},
-                        'drones': 0,
-                        'pos': (x, y)
-                    }
-                    
-                    self.grid[y][x] = HOSPITAL
-                    self.add_particle_system((x, y), GREEN)
+            elif self.selected_type == 'hospital':
+                if self.engine.add_hospital(x, y):
+                    self.invalidate_static_layer()
                     print(f"Hospital added at ({x}, {y})")  # Debug print
 
+    def invalidate_static_layer(self):
+        self.static_layer = None
+
+    def camera_moved(self, zoomed=False):
+        if zoomed:
+            # Sprites are sized to the cell
+            self.sprites.clear()
+        self.invalidate_static_layer()
+
+    def cell_rect(self, x, y):
+        size = self.camera.cell
+        return pygame.Rect(*self.camera.to_screen(x, y), size, size)
+
+    def screen_positions(self, cells):
+        """Top-left pixels (k, 2) of the cells (k, 2), as a list of pairs."""
+        ox, oy = self.camera.origin()
+        return (cells * self.camera.cell - (ox, oy)).tolist()
+
+    def in_view(self, xs, ys):
+        """Mask of the cells (xs, ys) inside the visible rectangle."""
+        x0, y0, x1, y1 = self.camera.visible()
+        return (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+
+    def build_static_layer(self):
+        layer = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE)).convert()
+        layer.fill(BG_COLOR)
+        camera = self.camera
+        size = camera.cell
+        x0, y0, x1, y1 = camera.visible()
+        left, top = camera.to_screen(x0, y0)
+        right, bottom = camera.to_screen(x1, y1)
+
+        # Grid lines: both edges of every visible cell, as the old per-cell outlines
+        line = (236, 240, 243)
+        for x in range(x0, x1):
+            px = left + (x - x0) * size
+            pygame.draw.line(layer, line, (px, top), (px, bottom))
+            pygame.draw.line(layer, line, (px + size - 1, top), (px + size - 1, bottom))
+        for y in range(y0, y1):
+            py = top + (y - y0) * size
+            pygame.draw.line(layer, line, (left, py), (right, py))
+            pygame.draw.line(layer, line, (left, py + size - 1), (right, py + size - 1))
+
+        ys, xs = np.nonzero(self.engine.grid[y0:y1, x0:x1] == BUILDING)
+        for x, y in zip((xs + x0).tolist(), (ys + y0).tolist()):
+            rect = self.cell_rect(x, y)
+            pygame.draw.rect(layer, BUILDING_COLOR, rect)
+            pygame.draw.rect(layer, WHITE, rect, 1)
+
+        for pos, rect in self.hospital_rects():
+            pygame.draw.rect(layer, GREEN, rect)
+            pygame.draw.rect(layer, WHITE, rect, 2)
+
+            # Draw hospital ID, when the cell is big enough to hold it
+            if size >= 20:
+                text = self.small_font.render(self.engine.hospitals[pos]['id'], True, WHITE)
+                text_rect = text.get_rect(center=rect.center)
+                layer.blit(text, text_rect)
+
+        self.static_layer = layer
+
+    def hospital_rects(self):
+        """(cell, screen rect) of every hospital in view."""
+        x0, y0, x1, y1 = self.camera.visible()
+        return [((x, y), self.cell_rect(x, y)) for x, y in self.engine.hospitals
+                if x0 <= x < x1 and y0 <= y < y1]
+
     def draw(self):
-        self.screen.fill(BG_COLOR)
-        
-        # Draw grid and elements
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(self.screen, (236, 240, 243), rect, 1)
-
-        self.draw_trails()
-        self.draw_paths()
-        self.draw_buildings()
-        self.draw_obstacles()
-        self.draw_drones()
+        screen = self.screen
+        if not self.camera.detailed:
+            # Zoomed out: the whole view is one image, redrawn every frame
+            screen.fill(BG_COLOR, GRID_RECT)
+            self.timed('draw_density', self.draw_density)
+            self.timed('draw_particles', self.draw_particles)
+            self.timed('draw_dashboard', self.draw_dashboard)
+            screen.fill(BG_COLOR, BUTTON_BAR_RECT)
+            self.draw_buttons()
+            pygame.display.update([GRID_RECT, DASHBOARD_RECT, BUTTON_BAR_RECT])
+            return
+
+        full_redraw = self.static_layer is None
+        if full_redraw:
+            self.build_static_layer()
+            screen.fill(BG_COLOR)
+            screen.blit(self.static_layer, GRID_RECT)
+        else:
+            # Erase last frame's moving entities by restoring the static layer
+            for rect in self.dirty_rects:
+                screen.blit(self.static_layer, rect, rect)
+
+        timed = self.timed
+        dirty = []
+        dirty += timed('draw_trails', self.draw_trails)
+        dirty += timed('draw_paths', self.draw_paths)
+        dirty += timed('draw_buildings', self.draw_buildings)
+        dirty += timed('draw_obstacles', self.draw_obstacles)
+        dirty += timed('draw_drones', self.draw_drones)
         
-        # Draw particles
-        for system in self.particle_systems:
-            for particle in system['particles']:
-                alpha = min(255, particle['life'] * 8)
-                color = (*system['color'], alpha)
-                pos = (int(particle['pos'][0]), int(particle['pos'][1]))
-                pygame.draw.circle(self.screen, color, pos, 2)
+        dirty += timed('draw_particles', self.draw_particles)
+
+        dirty = [rect.clip(GRID_RECT) for rect in dirty]
         
-        self.draw_dashboard()
+        timed('draw_dashboard', self.draw_dashboard)
+        screen.fill(BG_COLOR, BUTTON_BAR_RECT)
         self.draw_buttons()
-        
-        pygame.display.flip()
+
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty_rects + dirty + [DASHBOARD_RECT, BUTTON_BAR_RECT])
+        self.dirty_rects = dirty
+
+    def timed(self, stage, fn):
+        """Call fn, timing it as ``stage`` when the engine has a profiler attached."""
+        profiler = self.engine.profiler
+        if profiler is None:
+            return fn()
+        return profiler.run(stage, fn)
+
+    def draw_density(self):
+        image, position = self.density_image()
+        self.screen.blit(image, position)
+        # Obstacles and drones go straight into the screen's pixels
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        view = pixels[:WINDOW_SIZE, :WINDOW_SIZE]
+        engine = self.engine
+        for entities, color in ((engine.obstacles, BLUE), (engine.drones, RED)):
+            self.paint_cells(view, entities.pos[entities.slots()], color, 0, 0)
+        del view, pixels
+
+    def density_image(self):
+        """The visible cells as one surface and its screen position.
+
+        Buildings are shaded by their share of each block of ``block`` x
+        ``block`` cells, about one block per pixel, and the blocks are
+        sampled straight to view pixels; hospitals are marked on top. The
+        surface is kept until the map or the view changes, so a frame
+        costs one blit plus painting the entities in view.
+        """
+        engine = self.engine
+        camera = self.camera
+        x0, y0, x1, y1 = camera.visible()
+        left, top = camera.to_screen(x0, y0)
+        right, bottom = camera.to_screen(x1, y1)
+        left, top = max(left, 0), max(top, 0)
+        right, bottom = min(right, WINDOW_SIZE), min(bottom, WINDOW_SIZE)
+        key = (engine.map_version, camera.scale, camera.x, camera.y)
+        if key != self.density_key:
+            block = max(1, int(1 / camera.scale))
+            width, height = -(-(x1 - x0) // block), -(-(y1 - y0) // block)
+            built = np.zeros((height * block, width * block), dtype=np.float32)
+            built[:y1 - y0, :x1 - x0] = engine.grid[y0:y1, x0:x1] == BUILDING
+            share = built.reshape(height, block, width, block).mean(axis=(1, 3)).T
+
+            # Block under every view pixel
+            columns = (self.pixel_cells(left, right, 0) - x0) // block
+            rows = (self.pixel_cells(top, bottom, 1) - y0) // block
+            share = share[columns][:, rows]
+            background = np.array(BG_COLOR, dtype=np.float32)
+            tint = np.array(BUILDING_COLOR, dtype=np.float32) - background
+            base = (background + share[..., None] * tint).astype(np.uint8)
+            hospitals = np.array(list(engine.hospitals), dtype=np.int64).reshape(-1, 2)
+            self.paint_cells(base, hospitals, GREEN, left, top)
+            self.density_base = pygame.surfarray.make_surface(base).convert()
+            self.density_key = key
+        return self.density_base, (left, top)
+
+    def pixel_cells(self, start, stop, axis):
+        """Cell coordinate along ``axis`` under each view pixel from ``start`` to ``stop``."""
+        camera = self.camera
+        offset = camera.origin()[axis]
+        cells = (np.arange(start, stop) + offset) // camera.scale
+        return np.clip(cells.astype(np.int64), 0, camera.grid_size - 1)
+
+    def paint_cells(self, image, cells, color, left, top):
+        """Fill the pixels of the cells (k, 2) that are in view, at least one pixel each."""
+        cells = cells[self.in_view(cells[:, 0], cells[:, 1])]
+        if not len(cells):
+            return
+        camera = self.camera
+        ox, oy = camera.origin()
+        xs = np.ceil(cells[:, 0] * camera.scale).astype(np.int64) - ox - left
+        ys = np.ceil(cells[:, 1] * camera.scale).astype(np.int64) - oy - top
+        width, height = image.shape[:2]
+        for dx in range(max(1, int(camera.scale))):
+            for dy in range(max(1, int(camera.scale))):
+                px, py = xs + dx, ys + dy
+                inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                image[px[inside], py[inside]] = color
 
     def draw_trails(self):
-        for obstacle in self.moving_obstacles:
-            for i, (trail_x, trail_y) in enumerate(obstacle['trail']):
-                alpha = int(255 * (i + 1) / len(obstacle['trail']))
-                trail_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(trail_surface, (*BLUE, alpha // 4), trail_surface.get_rect())
-                self.screen.blit(trail_surface, (trail_x * CELL_SIZE, trail_y * CELL_SIZE))
-        
-        for drone in self.drones:
-            for i, (trail_x, trail_y) in enumerate(drone['trail']):
-                alpha = int(255 * (i + 1) / len(drone['trail']))
-                trail_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(trail_surface, (*RED, alpha // 4), trail_surface.get_rect())
-                self.screen.blit(trail_surface, (trail_x * CELL_SIZE, trail_y * CELL_SIZE))
+        dirty = []
+        blit = self.screen.blit
+        for entities, color in ((self.engine.obstacles, BLUE), (self.engine.drones, RED)):
+            slots = entities.slots()
+            trails = entities.trail[slots]
+            lengths = entities.trail_len[slots]
+            # Ring entries past each trail's length are unused; of the rest,
+            # keep the ones in view
+            capacity = trails.shape[1]
+            first = capacity - lengths
+            used = np.arange(capacity) >= first[:, None]
+            shown = used & self.in_view(trails[..., 0], trails[..., 1])
+            rows, places = np.nonzero(shown)
+            alphas = (255 * (places - first[rows] + 1) // np.maximum(lengths[rows], 1)) // 4
+            for alpha, position in zip(alphas.tolist(), self.screen_positions(trails[rows, places])):
+                dirty.append(blit(self.sprite(('trail', color, alpha)), position))
+        return dirty
 
     def draw_paths(self):
-        for drone in self.drones:
-            if drone['path']:
-                path_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-                for path_pos in drone['path']:
-                    x, y = path_pos
-                    rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    pygame.draw.rect(path_surface, (*PATH_COLOR, 128), rect)
-                self.screen.blit(path_surface, (0, 0))
+        overlay = self.path_overlay
+        for rect in self.path_overlay_cells:
+            overlay.fill((0, 0, 0, 0), rect)
+
+        drones = self.engine.drones
+        cells = drones.path_cells(drones.slots())
+        cells = cells[self.in_view(cells[:, 0], cells[:, 1])]
+        # Each cell once, however many paths cross it
+        n = self.engine.grid_size
+        flat = np.unique(cells[:, 1].astype(np.int64) * n + cells[:, 0])
+        rects = [self.cell_rect(cell % n, cell // n) for cell in flat.tolist()]
+        color = (*PATH_COLOR, 128)
+        for rect in rects:
+            overlay.fill(color, rect)
+        self.path_overlay_cells = rects
+
+        if not rects:
+            return []
+        bounds = rects[0].unionall(rects)
+        return [self.screen.blit(overlay, bounds, bounds)]
 
     def draw_buildings(self):
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                if self.grid[y][x] == BUILDING:
-                    rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    pygame.draw.rect(self.screen, BUILDING_COLOR, rect)
-                    pygame.draw.rect(self.screen, WHITE, rect, 1)
-                elif self.grid[y][x] == HOSPITAL:
-                    rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                    pygame.draw.rect(self.screen, GREEN, rect)
-                    pygame.draw.rect(self.screen, WHITE, rect, 2)
-                    
-                    # Draw hospital ID
-                    hospital = self.hospitals.get((x, y))
-                    if hospital:
-                        text = self.small_font.render(hospital['id'], True, WHITE)
-                        text_rect = text.get_rect(center=rect.center)
-                        self.screen.blit(text, text_rect)
+        # Buildings and hospitals live in the static layer; hospital tiles
+        # are restored on top so overlays never cover their labels
+        rects = [rect for _, rect in self.hospital_rects()]
+        for rect in rects:
+            self.screen.blit(self.static_layer, rect, rect)
+        return rects
 
     def draw_obstacles(self):
-        for obstacle in self.moving_obstacles:
-            x, y = map(int, obstacle['pos'])
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            
-            if obstacle['transparent']:
-                obstacle_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(obstacle_surface, (*BLUE, 128), obstacle_surface.get_rect())
-                self.screen.blit(obstacle_surface, rect)
-            else:
-                pygame.draw.rect(self.screen, BLUE, rect)
-                pygame.draw.rect(self.screen, (98, 155, 245), rect, 2)
+        dirty = []
+        obstacles = self.engine.obstacles
+        slots = obstacles.slots()
+        positions = obstacles.pos[slots]
+        inside = self.in_view(positions[:, 0], positions[:, 1])
+        transparent = obstacles.transparent[slots][inside].tolist()
+        sprites = (self.sprite(('obstacle', False)), self.sprite(('obstacle', True)))
+        blit = self.screen.blit
+        for position, see_through in zip(self.screen_positions(positions[inside]), transparent):
+            dirty.append(blit(sprites[see_through], position))
+        return dirty
 
     def draw_drones(self):
-        for drone in self.drones:
-            x, y = drone['pos']
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            
-            glow = self.create_glow_effect(CELL_SIZE, RED)
-            glow_pos = (x * CELL_SIZE - CELL_SIZE//2, y * CELL_SIZE - CELL_SIZE//2)
-            self.screen.blit(glow, glow_pos)
-            
-            pygame.draw.rect(self.screen, RED, rect)
-            pygame.draw.rect(self.screen, (235, 87, 87), rect, 2)
-    def deploy_drone(self):
-        hospitals = list(self.hospitals.items())
-        if len(hospitals) >= 2:
-            src_pos, src_hospital = random.choice(hospitals)
-            possible_dests = [(pos, hosp) for pos, hosp in hospitals 
-                            if pos != src_pos and hosp['needs']]
-            
-            if possible_dests and src_hospital['drones'] < 3:
-                dest_pos, dest_hospital = random.choice(possible_dests)
-                supply_type = random.choice(list(dest_hospital['needs'].keys()))
-                self.create_new_drone(src_hospital, src_pos, dest_hospital, dest_pos, supply_type)
+        dirty = []
+        drones = self.engine.drones
+        positions = drones.pos[drones.slots()]
+        inside = self.in_view(positions[:, 0], positions[:, 1])
+        sprite = self.sprite(('drone',))
+        half = self.camera.cell // 2
+        blit = self.screen.blit
+        for x, y in self.screen_positions(positions[inside]):
+            dirty.append(blit(sprite, (x - half, y - half)))
+        return dirty
         
     def handle_mouse_event(self, event):
         mouse_pos = event.pos
-        
-        # Handle scroll events
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 4:  # Scroll up
-                self.dashboard_scroll_y = max(0, self.dashboard_scroll_y - 20)
-            elif event.button == 5:  # Scroll down
-                self.dashboard_scroll_y = min(self.dashboard_height - TOTAL_HEIGHT, self.dashboard_scroll_y + 20)
+        engine = self.engine
+        
+        # Scrolling zooms the map around the cursor, or scrolls the dashboard;
+        # dragging with the right button pans the map
+        on_map = GRID_RECT.collidepoint(mouse_pos)
+        if event.button in (4, 5) and on_map:
+            if self.camera.zoom(2 if event.button == 4 else 0.5, mouse_pos):
+                self.camera_moved(zoomed=True)
+            return
+        if event.button == 3:
+            self.pan_anchor = mouse_pos if on_map else None
+            return
+        if event.button == 4:  # Scroll up
+            self.dashboard_scroll_y = max(0, self.dashboard_scroll_y - 20)
+        elif event.button == 5:  # Scroll down
+            self.dashboard_scroll_y = min(self.dashboard_height - TOTAL_HEIGHT, self.dashboard_scroll_y + 20)
         
         # Handle deploy controls when simulation is running
-        if self.simulation_running:
+        if engine.simulation_running:
             if hasattr(self, 'inc_button') and self.inc_button.collidepoint(mouse_pos):
-                self.deploy_count = min(5, self.deploy_count + 1)
+                engine.deploy_count = min(5, engine.deploy_count + 1)
             elif hasattr(self, 'dec_button') and self.dec_button.collidepoint(mouse_pos):
-                self.deploy_count = max(1, self.deploy_count - 1)
+                engine.deploy_count = max(1, engine.deploy_count - 1)
             elif hasattr(self, 'deploy_button') and self.deploy_button.collidepoint(mouse_pos):
-                self.deploy_active = not self.deploy_active
-            elif not self.deploy_active and hasattr(self, 'manual_deploy_button') and self.manual_deploy_button.collidepoint(mouse_pos):
-                self.deploy_single_drone()
+                engine.deploy_active = not engine.deploy_active
+            elif not engine.deploy_active and hasattr(self, 'manual_deploy_button') and self.manual_deploy_button.collidepoint(mouse_pos):
+                engine.deploy_single_drone()
         
         # Handle main buttons
         for name, rect in self.buttons.items():
@@ -582,17 +633,26 @@ class EnhancedGridSim:
                 elif name == 'start' and self.edit_mode:
                     self.handle_simulation_start()
                 elif name == 'stop':
-                    self.simulation_running = False
+                    engine.stop()
                     self.edit_mode = True
-                    self.deploy_active = False  # Reset deploy state
                 elif name == 'clear':
                     self.clear_simulation()
         
         # Handle grid clicks
-        if mouse_pos[1] < WINDOW_SIZE:
+        if event.button == 1 and on_map:
             self.handle_click(mouse_pos)
 
+    def handle_mouse_motion(self, event):
+        if self.pan_anchor is None or not event.buttons[2]:
+            self.pan_anchor = None
+            return
+        x, y = self.pan_anchor
+        self.camera.pan(x - event.pos[0], y - event.pos[1])
+        self.pan_anchor = event.pos
+        self.camera_moved()
+
     def draw_dashboard(self):
+        engine = self.engine
         dashboard_rect = pygame.Rect(WINDOW_SIZE, 0, 300, TOTAL_HEIGHT)
         pygame.draw.rect(self.screen, WHITE, dashboard_rect)
         pygame.draw.line(self.screen, GRAY, (WINDOW_SIZE, 0), (WINDOW_SIZE, TOTAL_HEIGHT), 2)
@@ -601,10 +661,13 @@ class EnhancedGridSim:
         y = 20  # Fixed y-coordinate for stats
 
         # Stats (fixed position, not affected by scrolling)
+        clock = self.sim_clock
+        speed = "Fast-forward" if clock.fast_forward else f"{clock.time_scale:g}x"
         titles = [
-            f"Deliveries: {self.total_deliveries}",
-            f"Active Routes: {self.active_routes}",
-            f"Emergencies: {self.emergency_count}"
+            f"Deliveries: {engine.total_deliveries}",
+            f"Active Routes: {engine.active_routes}",
+            f"Emergencies: {engine.emergency_count}",
+            f"Sim Time: {engine.tick_count // TICK_RATE}s  Speed: {speed}"
         ]
         
         for title in titles:
@@ -615,7 +678,7 @@ class EnhancedGridSim:
         y += 20  # Add spacing after stats
 
         # Hospital details (scrollable)
-        for pos, hospital in self.hospitals.items():
+        for pos, hospital in engine.hospitals.items():
             text = self.small_font.render(f"{hospital['id']} (Drones: {hospital['drones']})", True, GREEN)
             self.screen.blit(text, (x, y - self.dashboard_scroll_y))  # Apply scroll offset
             y += 25
@@ -634,20 +697,23 @@ class EnhancedGridSim:
         # Update dashboard height based on content
         self.dashboard_height = y + self.dashboard_scroll_y
 
+        if engine.profiler is not None:
+            self.draw_profiler_panel(x, TOTAL_HEIGHT - 130)
+
         # Auto deploy toggle (positioned at the bottom, fixed)
         y = TOTAL_HEIGHT - 120
-        if self.simulation_running:
+        if engine.simulation_running:
             deploy_rect = pygame.Rect(x, y, 260, 40)
-            color = GREEN if self.deploy_active else GRAY
+            color = GREEN if engine.deploy_active else GRAY
             pygame.draw.rect(self.screen, color, deploy_rect, border_radius=4)
-            status = "Auto Deploy: ON" if self.deploy_active else "Auto Deploy: OFF"
+            status = "Auto Deploy: ON" if engine.deploy_active else "Auto Deploy: OFF"
             text = self.font.render(status, True, WHITE)
             text_rect = text.get_rect(center=deploy_rect.center)
             self.screen.blit(text, text_rect)
             self.deploy_button = deploy_rect
             
             # Manual deploy button (when auto is off)
-            if not self.deploy_active:
+            if not engine.deploy_active:
                 y += 50
                 manual_rect = pygame.Rect(x, y, 260, 40)
                 pygame.draw.rect(self.screen, BLUE, manual_rect, border_radius=4)
@@ -656,15 +722,28 @@ class EnhancedGridSim:
                 self.screen.blit(text, text_rect)
                 self.manual_deploy_button = manual_rect
 
-    def update_hospital_needs(self):
-        for hospital in self.hospitals.values():
-            # 5% chance to update needs
-            if random.random() < 0.05:
-                available_supplies = [s for s in self.possible_supplies.keys() 
-                                if s not in hospital['needs']]
-                if available_supplies:
-                    new_need = random.choice(available_supplies)
-                    hospital['needs'][new_need] = 0
+    def draw_profiler_panel(self, x, bottom):
+        """Slowest stages and per-tick counters, drawn upwards from ``bottom``."""
+        profiler = self.engine.profiler
+        lines = [f"{stage}: {mean:.2f} / {p95:.2f} ms" for stage, mean, p95 in profiler.slowest(8)]
+        counters = profiler.counters
+        if counters:
+            def per_tick(name):
+                series = counters.get(name)
+                return series.summary().get('mean', 0.0) if series else 0.0
+            hits, misses = per_tick('path_cache_hits'), per_tick('path_cache_misses')
+            lines.append(f"A* nodes/tick: {per_tick('astar_expansions'):.1f}  replans/tick: {per_tick('replans'):.2f}")
+            lines.append(f"path cache hits: {hits / (hits + misses) if hits + misses else 0.0:.0%}")
+
+        height = 28 + 18 * len(lines)
+        panel = pygame.Rect(x - 10, bottom - height, 280, height)
+        pygame.draw.rect(self.screen, BG_COLOR, panel, border_radius=4)
+        pygame.draw.rect(self.screen, GRAY, panel, 1, border_radius=4)
+        y = panel.y + 6
+        self.screen.blit(self.small_font.render("Profile (mean / p95)", True, BLACK), (x, y))
+        for line in lines:
+            y += 18
+            self.screen.blit(self.small_font.render(line, True, BLACK), (x, y))
 
     def draw_buttons(self):
         for name, rect in self.buttons.items():
@@ -675,108 +754,62 @@ class EnhancedGridSim:
             label = self.button_labels[name]
             label_rect = label.get_rect(center=rect.center)
             self.screen.blit(label, label_rect)
-    
-    def deploy_drones(self):
-        if not self.deploy_active or not self.simulation_running:
-            return
-            
-        self.deploy_timer += 1
-        if self.deploy_timer < self.deploy_interval:
-            return
-            
-        self.deploy_timer = 0
-        
-        # Deploy based on count
-        for _ in range(self.deploy_count):
-            self.deploy_single_drone()
-
-    def deploy_single_drone(self):
-        hospitals = list(self.hospitals.items())
-        if len(hospitals) >= 2:
-            src_pos, src_hospital = random.choice(hospitals)
-            possible_dests = [(pos, hosp) for pos, hosp in hospitals 
-                            if pos != src_pos and len(hosp['needs']) > 0]
-            
-            if possible_dests and src_hospital['drones'] < 3:
-                dest_pos, dest_hospital = random.choice(possible_dests)
-                supply_type = random.choice(list(dest_hospital['needs'].keys()))
-                self.create_new_drone(src_hospital, src_pos, dest_hospital, dest_pos, supply_type)
 
-    def update_simulation(self):
-        if not self.simulation_running:
+    def update_simulation(self, ticks=1):
+        if not self.engine.simulation_running:
             return
 
-        if self.deploy_active:
-            self.deploy_drones()
-        
-        self.update_drones()
-        self.update_moving_obstacles()
-        self.update_particles()
-        self.process_alerts()
-        self.update_hospital_needs()
-
-
-    def complete_delivery(self, drone):
-        self.total_deliveries += 1
-        self.active_routes -= 1
-        
-        # Update origin hospital
-        for hospital in self.hospitals.values():
-            if hospital['id'] == drone['origin_hospital']:
-                hospital['drones'] -= 1
-                break
-        
-        # Update destination hospital's needs
-        dest_pos = drone['destination']
-        if dest_pos in self.hospitals:
-            dest_hospital = self.hospitals[dest_pos]
-            supply_type = drone['type']
-            if supply_type in dest_hospital['needs']:
-                dest_hospital['needs'].pop(supply_type)
-        
-        self.add_particle_system(drone['destination'], GREEN)
-        self.drones.remove(drone)
+        self.engine.step(ticks)
+        self.timed('update_particles', self.update_particles)
+
+    def handle_key(self, key):
+        clock = self.sim_clock
+        if key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            clock.set_time_scale(clock.time_scale * 2)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            clock.set_time_scale(clock.time_scale / 2)
+        elif key == pygame.K_1:
+            clock.set_time_scale(1.0)
+        elif key == pygame.K_f:
+            clock.fast_forward = not clock.fast_forward
+        elif key == pygame.K_p:
+            engine = self.engine
+            engine.profiler = TickProfiler() if engine.profiler is None else None
+        elif key in PAN_KEYS:
+            dx, dy = PAN_KEYS[key]
+            self.camera.pan(dx * WINDOW_SIZE // 4, dy * WINDOW_SIZE // 4)
+            self.camera_moved()
+            return
+        elif key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+            centre = (WINDOW_SIZE // 2, WINDOW_SIZE // 2)
+            if self.camera.zoom(2 if key == pygame.K_PAGEUP else 0.5, centre):
+                self.camera_moved(zoomed=True)
+            return
+        elif key == pygame.K_HOME:
+            self.camera.reset()
+            self.camera_moved(zoomed=True)
+            return
+        clock.reset()
 
-    def find_safe_path(self, start, end):
-        return self.find_path(start, end)
+    def fast_forward(self):
+        """Step the sim flat out until the next frame is due; skips rendering."""
+        engine = self.engine
+        deadline = pygame.time.get_ticks() + FAST_FORWARD_REDRAW * 1000
+        while engine.simulation_running and pygame.time.get_ticks() < deadline:
+            engine.step(TICK_RATE)
 
     def handle_simulation_start(self):
-        self.drones.clear()
-        self.active_hospital_drones.clear()
-        self.create_alert_file()
-        
         self.edit_mode = False
-        self.simulation_running = True
-        
-        self.moving_obstacles.clear()
-        self.obstacle_spawn_timer = 0
-        
-        for _ in range(20):
-            self.spawn_moving_obstacle()
-        
-        self.drone_move_timer = 0
-        self.obstacle_move_timer = 0
-        
-        self.alert_thread = threading.Thread(target=self.generate_alerts)
-        self.alert_thread.daemon = True
-        self.alert_thread.start()
+        self.engine.start()
+        self.sim_clock.reset()
 
     def clear_simulation(self):
-        self.simulation_running = False
-        if self.alert_thread and self.alert_thread.is_alive():
-            self.alert_thread.join()
-        
-        self.grid = [[EMPTY for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.hospitals.clear()
-        self.buildings.clear()
-        self.drones.clear()
-        self.moving_obstacles.clear()
-        self.active_hospital_drones.clear()
-        self.particle_systems.clear()
+        self.engine.clear()
+        self.particles.clear()
+        self.invalidate_static_layer()
         
         self.edit_mode = True
         self.selected_type = None
-        self.create_alert_file()
 
     def run(self):
         clock = pygame.time.Clock()
@@ -787,15 +820,38 @@ class EnhancedGridSim:
                     self.running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_mouse_event(event)
+                elif event.type == pygame.MOUSEMOTION:
+                    self.handle_mouse_motion(event)
+                elif event.type == pygame.KEYDOWN:
+                    self.handle_key(event.key)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.invalidate_static_layer()
             
-            if self.simulation_running:
-                self.update_simulation()
+            if self.sim_clock.fast_forward and self.engine.simulation_running:
+                self.fast_forward()
+                self.draw()
+                continue
+
+            ticks = self.sim_clock.advance()
+            if self.engine.simulation_running:
+                self.update_simulation(ticks)
             
             self.draw()
-            clock.tick(60)
+            clock.tick(FPS)
 
         pygame.quit()
 
 if __name__ == "__main__":
-    sim = EnhancedGridSim()
-    sim.run()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Interactive drone simulation viewer.")
+    parser.add_argument('--map', metavar='PATH', help="start from a .npy, .pgm or .ppm city map")
+    args = parser.parse_args()
+
+    engine = None
+    if args.map:
+        city = load_map(args.map)
+        engine = SimulationEngine(grid_size=city.shape[0])
+        engine.load_layout(city)
+    sim = EnhancedGridSim(engine)
+    sim.run()
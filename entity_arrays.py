@@ -0,0 +1,255 @@
+import numpy as np
+
+
+class SlotArrays:
+    """Fixed-layout NumPy columns with slot reuse.
+
+    Subclasses list their per-entity columns in ``columns`` as
+    ``name: (trailing shape, dtype)``. Entities live in slots; removed slots
+    are recycled through a free list, and every column doubles in size when
+    the store runs out of room. ``alive`` marks the occupied slots.
+    """
+
+    columns = {}
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        for name, (shape, dtype) in self.columns.items():
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+        self.free = list(range(capacity - 1, -1, -1))
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        old = self.capacity
+        self.capacity = old * 2
+        for name in ['alive'] + list(self.columns):
+            column = getattr(self, name)
+            grown = np.zeros((self.capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:old] = column
+            setattr(self, name, grown)
+        self.free.extend(range(self.capacity - 1, old - 1, -1))
+
+    def _allocate(self):
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.alive[slot] = True
+        self.count += 1
+        return slot
+
+    def _release(self, slots):
+        slots = np.atleast_1d(slots)
+        self.alive[slots] = False
+        self.free.extend(int(s) for s in slots)
+        self.count -= len(slots)
+
+    def slots(self):
+        """Indices of occupied slots, in slot order."""
+        return np.flatnonzero(self.alive)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.count = 0
+
+    def state(self):
+        """Arrays that fully describe the store, slot layout and free list included."""
+        arrays = {'alive': self.alive.copy(), 'free': np.array(self.free, dtype=np.int64)}
+        for name in self.columns:
+            arrays[name] = getattr(self, name).copy()
+        return arrays
+
+    def load_state(self, arrays):
+        self.alive = np.array(arrays['alive'], dtype=bool)
+        self.capacity = len(self.alive)
+        for name, (shape, dtype) in self.columns.items():
+            setattr(self, name, np.array(arrays[name], dtype=dtype).reshape((self.capacity,) + shape))
+        self.free = arrays['free'].tolist()
+        self.count = int(self.alive.sum())
+
+    def push_trail(self, slots, cells):
+        """Append cells (k, 2) to the trail ring of each slot."""
+        if len(slots) == 0:
+            return
+        trail = self.trail
+        shifted = trail[slots, 1:]
+        trail[slots, :-1] = shifted
+        trail[slots, -1] = cells
+        self.trail_len[slots] = np.minimum(self.trail_len[slots] + 1, trail.shape[1])
+
+    def trail_cells(self, slot):
+        """Trail of one slot as (x, y) tuples, oldest first."""
+        length = int(self.trail_len[slot])
+        if not length:
+            return []
+        return [tuple(cell) for cell in self.trail[slot, -length:].tolist()]
+
+
+class ObstacleArrays(SlotArrays):
+    """Moving obstacles as parallel arrays of positions and headings."""
+
+    columns = {
+        'pos': ((2,), np.int32),
+        'direction': ((2,), np.int32),
+        'transparent': ((), bool),
+        'trail': ((5, 2), np.int32),
+        'trail_len': ((), np.int32),
+    }
+
+    def spawn(self, x, y, dx, dy):
+        slot = self._allocate()
+        self.pos[slot] = (x, y)
+        self.direction[slot] = (dx, dy)
+        self.transparent[slot] = False
+        self.trail_len[slot] = 0
+        return slot
+
+    def remove(self, slots):
+        self._release(slots)
+
+
+class DroneArrays(SlotArrays):
+    """Drones as parallel arrays plus a shared pool of path cells.
+
+    Each drone's path is a run ``path_start .. path_start + path_len`` of
+    ``path_pool``; ``cursor`` indexes the next cell to fly to, so advancing
+    never shifts a list. Replacing a path appends a new run; when the pool
+    fills up, the remaining parts of live paths are compacted into a pool at
+    least twice their size. Identifiers and cargo stay in plain lists
+    indexed by slot.
+    """
+
+    columns = {
+        'pos': ((2,), np.int32),
+        'destination': ((2,), np.int32),
+        'path_start': ((), np.int64),
+        'path_len': ((), np.int32),
+        'cursor': ((), np.int32),
+        'created_tick': ((), np.int64),
+        'trail': ((10, 2), np.int32),
+        'trail_len': ((), np.int32),
+    }
+
+    def __init__(self, capacity=64):
+        super().__init__(capacity)
+        self.ids = [None] * capacity
+        self.origin_ids = [None] * capacity
+        self.supply_types = [None] * capacity
+        self.slot_by_id = {}
+        self.path_pool = np.zeros((1024, 2), dtype=np.int32)
+        self.pool_used = 0
+
+    def _grow(self):
+        old = self.capacity
+        super()._grow()
+        extra = [None] * (self.capacity - old)
+        self.ids.extend(extra)
+        self.origin_ids.extend(extra)
+        self.supply_types.extend(extra)
+
+    def add(self, drone_id, pos, destination, path, origin_id, supply_type, created_tick=0):
+        slot = self._allocate()
+        self.pos[slot] = pos
+        self.destination[slot] = destination
+        self.created_tick[slot] = created_tick
+        self.trail_len[slot] = 0
+        self.ids[slot] = drone_id
+        self.origin_ids[slot] = origin_id
+        self.supply_types[slot] = supply_type
+        self.slot_by_id[drone_id] = slot
+        self.set_path(slot, path)
+        return slot
+
+    def remove(self, slot):
+        self._release(slot)
+        drone_id = self.ids[slot]
+        if self.slot_by_id.get(drone_id) == slot:
+            del self.slot_by_id[drone_id]
+        self.ids[slot] = None
+        self.path_len[slot] = 0
+        self.cursor[slot] = 0
+
+    def clear(self):
+        super().clear()
+        self.slot_by_id.clear()
+        self.pool_used = 0
+
+    def state(self):
+        arrays = super().state()
+        arrays['path_pool'] = self.path_pool[:self.pool_used].copy()
+        arrays['pool_size'] = np.array(len(self.path_pool), dtype=np.int64)
+        return arrays
+
+    def meta(self):
+        """Per-slot identifiers and cargo, which don't fit the numeric columns."""
+        return {'ids': self.ids, 'origin_ids': self.origin_ids, 'supply_types': self.supply_types}
+
+    def load_state(self, arrays, meta):
+        super().load_state(arrays)
+        self.ids = list(meta['ids'])
+        self.origin_ids = list(meta['origin_ids'])
+        self.supply_types = list(meta['supply_types'])
+        self.slot_by_id = {self.ids[slot]: slot for slot in self.slots().tolist()}
+        used = arrays['path_pool']
+        self.path_pool = np.zeros((int(arrays['pool_size']), 2), dtype=np.int32)
+        self.path_pool[:len(used)] = used
+        self.pool_used = len(used)
+
+    def set_path(self, slot, path):
+        length = len(path)
+        if self.pool_used + length > len(self.path_pool):
+            self._compact(length)
+        start = self.pool_used
+        if length:
+            self.path_pool[start:start + length] = path
+        self.path_start[slot] = start
+        self.path_len[slot] = length
+        self.cursor[slot] = 0
+        self.pool_used += length
+
+    def _compact(self, extra):
+        slots = self.slots()
+        remaining = self.path_len[slots] - self.cursor[slots]
+        live = int(remaining.sum())
+        size = len(self.path_pool)
+        while live + extra > size // 2:
+            size *= 2
+        pool = np.zeros((size, 2), dtype=np.int32)
+        used = 0
+        for slot, length in zip(slots.tolist(), remaining.tolist()):
+            begin = int(self.path_start[slot] + self.cursor[slot])
+            pool[used:used + length] = self.path_pool[begin:begin + length]
+            self.path_start[slot] = used
+            self.path_len[slot] = length
+            self.cursor[slot] = 0
+            used += length
+        self.path_pool = pool
+        self.pool_used = used
+
+    def path(self, slot):
+        """Remaining path of one drone as (x, y) tuples."""
+        begin = int(self.path_start[slot] + self.cursor[slot])
+        end = int(self.path_start[slot] + self.path_len[slot])
+        return [tuple(cell) for cell in self.path_pool[begin:end].tolist()]
+
+    def path_cells(self, slots):
+        """Remaining path cells (m, 2) of the given slots, concatenated."""
+        begin = self.path_start[slots] + self.cursor[slots]
+        lengths = self.path_len[slots] - self.cursor[slots]
+        total = int(lengths.sum())
+        if not total:
+            return self.path_pool[:0]
+        # Pool index of every cell: its run's start plus its place in the run
+        offsets = np.repeat(begin - np.cumsum(lengths) + lengths, lengths)
+        return self.path_pool[offsets + np.arange(total)]
+
+    def has_path(self, slots):
+        return self.cursor[slots] < self.path_len[slots]
+
+    def next_cells(self, slots):
+        """Next path cell (k, 2) for each of the given slots."""
+        return self.path_pool[self.path_start[slots] + self.cursor[slots]]
@@ -0,0 +1,164 @@
+import csv
+import glob
+import os
+
+import numpy as np
+
+# Event kinds
+DRONE_CREATED = 1
+DRONE_REPLANNED = 2
+DRONE_MOVED = 3
+DRONE_DELIVERED = 4
+OBSTACLE_SPAWNED = 5
+
+EVENT_NAMES = {
+    DRONE_CREATED: 'drone_created',
+    DRONE_REPLANNED: 'drone_replanned',
+    DRONE_MOVED: 'drone_moved',
+    DRONE_DELIVERED: 'drone_delivered',
+    OBSTACLE_SPAWNED: 'obstacle_spawned',
+}
+
+# One fixed-width little-endian record per event (20 bytes). ``entity`` is
+# the drone or obstacle slot; a slot is reused only after its entity has
+# gone, so created/delivered events bracket each drone. ``x``/``y`` is the
+# event cell and ``x2``/``y2`` the destination (created, replanned) or the
+# cell moved from (moved).
+EVENT_DTYPE = np.dtype([
+    ('tick', '<u4'),
+    ('kind', '<u2'),
+    ('entity', '<i4'),
+    ('x', '<i2'),
+    ('y', '<i2'),
+    ('x2', '<i2'),
+    ('y2', '<i2'),
+    ('pad', '<u2'),
+])
+
+CSV_HEADER = ['tick', 'kind', 'entity', 'x', 'y', 'x2', 'y2']
+
+EXTENSIONS = {'binary': '.bin', 'csv': '.csv'}
+
+
+class EventLog:
+    """Append-only simulation event log written in batches to rotating segments.
+
+    Events are staged in a preallocated record array and written out when it
+    fills (or on ``flush()``), so the tick loop never touches the file per
+    event. Segments are named ``events-000000.bin`` (or ``.csv``) in
+    ``directory``; a new one is started once the current segment reaches
+    ``segment_bytes``. The binary format is a bare array of ``EVENT_DTYPE``
+    records, so ``read_events()`` can memory-map segments without parsing.
+    """
+
+    def __init__(self, directory, fmt='binary', batch_size=4096, segment_bytes=64 * 1024 * 1024):
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unknown event log format: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.segment_bytes = segment_bytes
+        self.buffer = np.zeros(batch_size, dtype=EVENT_DTYPE)
+        self.pending = 0
+        self.written = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.segment = len(segment_paths(directory, fmt))
+        self.file = None
+        self._open_segment()
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, f"events-{self.segment:06d}{EXTENSIONS[self.fmt]}")
+        if self.fmt == 'binary':
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'a', newline='')
+            if self.file.tell() == 0:
+                csv.writer(self.file).writerow(CSV_HEADER)
+
+    def _rotate(self):
+        self.file.close()
+        self.segment += 1
+        self._open_segment()
+
+    def record(self, tick, kind, entity, x, y, x2=-1, y2=-1):
+        if self.pending == len(self.buffer):
+            self.flush()
+        self.buffer[self.pending] = (tick, kind, entity, x, y, x2, y2, 0)
+        self.pending += 1
+
+    def record_many(self, tick, kind, entities, cells, other_cells=None):
+        """Record one event per entity; ``cells``/``other_cells`` are (k, 2) arrays."""
+        count = len(entities)
+        start = 0
+        while start < count:
+            if self.pending == len(self.buffer):
+                self.flush()
+            take = min(count - start, len(self.buffer) - self.pending)
+            batch = self.buffer[self.pending:self.pending + take]
+            end = start + take
+            batch['tick'] = tick
+            batch['kind'] = kind
+            batch['entity'] = entities[start:end]
+            batch['x'] = cells[start:end, 0]
+            batch['y'] = cells[start:end, 1]
+            if other_cells is None:
+                batch['x2'] = -1
+                batch['y2'] = -1
+            else:
+                batch['x2'] = other_cells[start:end, 0]
+                batch['y2'] = other_cells[start:end, 1]
+            batch['pad'] = 0
+            self.pending += take
+            start = end
+
+    def flush(self):
+        if not self.pending or self.file is None:
+            return
+        records = self.buffer[:self.pending]
+        if self.fmt == 'binary':
+            self.file.write(records.tobytes())
+        else:
+            rows = np.column_stack([records[name] for name in CSV_HEADER])
+            csv.writer(self.file).writerows(rows.tolist())
+        self.file.flush()
+        self.written += self.pending
+        self.pending = 0
+        if self.file.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def segment_paths(directory, fmt='binary'):
+    """Segment files of an event log directory, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, f"events-*{EXTENSIONS[fmt]}")))
+
+
+def read_events(directory, fmt='binary'):
+    """Return the log's records as a list of arrays, one per segment.
+
+    Binary segments are memory-mapped read-only, so multi-gigabyte logs can
+    be filtered with NumPy without loading them; CSV segments are parsed
+    into arrays of the same dtype.
+    """
+    segments = []
+    for path in segment_paths(directory, fmt):
+        if fmt == 'binary':
+            size = os.path.getsize(path) // EVENT_DTYPE.itemsize
+            if size:
+                segments.append(np.memmap(path, dtype=EVENT_DTYPE, mode='r', shape=(size,)))
+        else:
+            with open(path, newline='') as file:
+                rows = list(csv.reader(file))[1:]
+            if not rows:
+                continue
+            rows = np.array(rows, dtype=np.int64)
+            records = np.zeros(len(rows), dtype=EVENT_DTYPE)
+            for i, name in enumerate(CSV_HEADER):
+                records[name] = rows[:, i]
+            segments.append(records)
+    return segments
@@ -0,0 +1,120 @@
+import numpy as np
+
+# Axis-aligned headings, in the order of the forecast's heading planes
+HEADINGS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class ObstacleForecast:
+    """Expected obstacle proximity over the engine's ``forecast_horizon`` ticks.
+
+    Each obstacle keeps its heading, or with ``turn_probability`` picks one
+    of the four axis headings at random, then steps one cell; obstacles
+    leaving the grid disappear. That is a Markov chain on (heading, cell),
+    so the expected number of obstacles per cell after k moves is found by
+    pushing the current obstacles' one-hot masses through it: one shifted
+    copy of four (n, n) planes per move. ``volume[k]`` is then the
+    expected proximity count (obstacles within ``radius``) of every flat
+    cell after k moves, with ``volume[0]`` the present; ``rows`` are
+    memoryviews of its slices for the planner's scalar loop, which reads
+    them as Python floats without converting the volume. Obstacles
+    spawned in the meantime are not forecast.
+
+    The volume is rebuilt lazily when the obstacles have moved since the
+    last build.
+    """
+
+    def __init__(self, engine, turn_probability=0.15):
+        self.engine = engine
+        self.turn_probability = turn_probability
+        self.key = None
+        self.volume = None
+        self.rows = None
+        self.builds = 0
+
+    @property
+    def steps(self):
+        """Obstacle moves covered by the horizon."""
+        engine = self.engine
+        return -(-engine.forecast_horizon // engine.obstacle_move_interval)
+
+    def clear(self):
+        self.key = None
+        self.volume = None
+        self.rows = None
+
+    def current_key(self):
+        """What the volume depends on; it is rebuilt when this changes."""
+        engine = self.engine
+        return engine.map_version, engine.cost_log.epoch, len(engine.obstacles), self.steps
+
+    def state(self):
+        """The volume, if it is up to date."""
+        if self.volume is None or self.key != self.current_key():
+            return {}
+        return {'volume': self.volume}
+
+    def load_state(self, arrays):
+        """Take over a saved volume as current for the engine's restored obstacles."""
+        self.clear()
+        if 'volume' in arrays:
+            self.volume = np.array(arrays['volume'], dtype=np.float64)
+            self.rows = [memoryview(plane) for plane in self.volume]
+            self.key = self.current_key()
+
+    def refresh(self):
+        """Bring the (steps + 1, n * n) volume up to date and return ``rows``."""
+        key = self.current_key()
+        if key != self.key:
+            self.volume = self.build(self.steps)
+            self.rows = [memoryview(plane) for plane in self.volume]
+            self.key = key
+            self.builds += 1
+        return self.rows
+
+    def slice_at(self, ticks_ahead):
+        """Volume index for a moment ``ticks_ahead`` ticks from now, capped at the horizon."""
+        engine = self.engine
+        return min(self.steps, (engine.obstacle_move_timer + ticks_ahead) // engine.obstacle_move_interval)
+
+    def build(self, steps):
+        engine = self.engine
+        n = engine.grid_size
+        obstacles = engine.obstacles
+        slots = obstacles.slots()
+        pos = obstacles.pos[slots]
+        direction = obstacles.direction[slots]
+
+        mass = np.zeros((len(HEADINGS), n, n))
+        for plane, (dx, dy) in enumerate(HEADINGS):
+            heading = (direction[:, 0] == dx) & (direction[:, 1] == dy)
+            np.add.at(mass[plane], (pos[heading, 1], pos[heading, 0]), 1.0)
+
+        keep = 1.0 - self.turn_probability
+        turn = self.turn_probability / len(HEADINGS)
+        occupancy = np.empty((steps + 1, n, n))
+        occupancy[0] = mass.sum(axis=0)
+        for k in range(1, steps + 1):
+            turning = occupancy[k - 1] * turn
+            moved = np.zeros_like(mass)
+            for plane, (dx, dy) in enumerate(HEADINGS):
+                source = mass[plane] * keep + turning
+                # Shift by (dx, dy); whatever crosses the edge leaves the grid
+                moved[plane,
+                      max(dy, 0):n + min(dy, 0),
+                      max(dx, 0):n + min(dx, 0)] = source[max(-dy, 0):n + min(-dy, 0),
+                                                         max(-dx, 0):n + min(-dx, 0)]
+            mass = moved
+            occupancy[k] = mass.sum(axis=0)
+
+        return self.box_sum(occupancy, engine.obstacle_field.radius).reshape(steps + 1, n * n)
+
+    @staticmethod
+    def box_sum(occupancy, radius):
+        """Sum every (2 * radius + 1) square box of each (n, n) slice, clipped at the edges."""
+        steps, n, _ = occupancy.shape
+        padded = np.zeros((steps, n + 1, n + 1))
+        padded[:, 1:, 1:] = occupancy.cumsum(axis=1).cumsum(axis=2)
+        lo = np.clip(np.arange(n) - radius, 0, n)
+        hi = np.clip(np.arange(n) + radius + 1, 0, n)
+        return (padded[:, hi[:, None], hi[None, :]] - padded[:, lo[:, None], hi[None, :]]
+                - padded[:, hi[:, None], lo[None, :]] + padded[:, lo[:, None], lo[None, :]])
@@ -0,0 +1,164 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from city_map import BUILDING
+
+NEIGHBOR_OFFSETS = [(0, 1), (1, 0), (0, -1), (-1, 0),
+                    (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+# Cells per slice when filling the adjacency of a large grid
+BAND_CELLS = 1 << 20
+
+
+class GridAStar:
+    """A* over flat cell indices (``y * grid_size + x``) with reusable buffers.
+
+    Passable cells and their neighbours are stored as a CSR adjacency
+    (``offsets``/``targets``) built once from the engine's grid of cell codes
+    and rebuilt lazily after ``invalidate()``. The g-score, parent and seen
+    buffers are typed arrays, allocated once and reused: a per-search
+    generation stamp marks which entries are current, so nothing is cleared
+    between searches. As in the original planner, a cell is expanded again
+    if a cheaper route to it turns up later; superseded heap entries are
+    skipped when popped.
+    """
+
+    def __init__(self, grid_size, obstacle_field, obstacle_weight=2):
+        self.grid_size = grid_size
+        self.obstacle_field = obstacle_field
+        self.obstacle_weight = obstacle_weight
+
+        size = grid_size * grid_size
+        self.g_score = array('q', [0]) * size
+        self.parent = array('i', [0]) * size
+        self.seen = array('q', [0]) * size
+        self.generation = 0
+
+        self.offsets = None
+        self.targets = None
+        self.blocked = None
+        self.expansions = 0
+        self.searches = 0
+
+    def invalidate(self):
+        """Mark the adjacency stale after the building layout changed."""
+        self.offsets = None
+
+    def build(self, grid):
+        n = self.grid_size
+        blocked = np.asarray(grid) == BUILDING
+        free = ~blocked
+
+        # Free neighbours per direction, then per cell
+        valid = []
+        counts = np.zeros(n * n, dtype=np.int8)
+        for dx, dy in NEIGHBOR_OFFSETS:
+            # Cells whose neighbour (x + dx, y + dy) is on the grid and free
+            src_y = slice(max(0, -dy), n - max(0, dy))
+            src_x = slice(max(0, -dx), n - max(0, dx))
+            dst_y = slice(max(0, dy), n - max(0, -dy))
+            dst_x = slice(max(0, dx), n - max(0, -dx))
+            mask = np.zeros((n, n), dtype=bool)
+            mask[src_y, src_x] = free[src_y, src_x] & free[dst_y, dst_x]
+            counts += mask.ravel()
+            valid.append(mask.ravel())
+
+        # The CSR is written straight into the typed arrays the search reads,
+        # a band of rows at a time, so the index arrays stay small on big maps
+        self.offsets = array('q', [0]) * (n * n + 1)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        self.targets = array('i', [0]) * int(offsets[-1])
+        targets = np.frombuffer(self.targets, dtype=np.int32)
+        steps = np.array([dy * n + dx for dx, dy in NEIGHBOR_OFFSETS], dtype=np.int32)
+        band = max(1, BAND_CELLS // n) * n
+        for first in range(0, n * n, band):
+            last = min(first + band, n * n)
+            present = np.stack([mask[first:last] for mask in valid], axis=1)
+            neighbours = np.arange(first, last, dtype=np.int32)[:, None] + steps
+            targets[offsets[first]:offsets[last]] = neighbours[present]
+
+        self.blocked = bytearray(blocked.tobytes())
+
+    def adjacency(self, grid):
+        """Return the current (offsets, targets) CSR, rebuilding it from ``grid`` if stale."""
+        if self.offsets is None:
+            self.build(grid)
+        return self.offsets, self.targets
+
+    def blocked_mask(self, grid):
+        """Flat boolean view of building cells, rebuilding the CSR if stale."""
+        if self.offsets is None:
+            self.build(grid)
+        return np.frombuffer(self.blocked, dtype=bool)
+
+    def find_path(self, start, end, grid):
+        """Return the cells from start (exclusive) to end, or [] if unreachable."""
+        if self.offsets is None:
+            self.build(grid)
+
+        n = self.grid_size
+        sx, sy = start
+        ex, ey = end
+        if not (0 <= sx < n and 0 <= sy < n and 0 <= ex < n and 0 <= ey < n):
+            return []
+        source = sy * n + sx
+        target = ey * n + ex
+        if self.blocked[target]:
+            return []
+
+        self.generation += 1
+        generation = self.generation
+        self.searches += 1
+
+        g_score = self.g_score
+        parent = self.parent
+        seen = self.seen
+        offsets = self.offsets
+        targets = self.targets
+        proximity = self.obstacle_field.proximity
+        weight = self.obstacle_weight
+        sqrt = math.sqrt
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        g_score[source] = 0
+        parent[source] = source
+        seen[source] = generation
+        frontier = [(0, 0, source)]
+        expansions = 0
+
+        while frontier:
+            _, cost, current = heappop(frontier)
+            if cost != g_score[current]:
+                continue
+            expansions += 1
+            if current == target:
+                break
+
+            base = cost + 1
+            for i in range(offsets[current], offsets[current + 1]):
+                nxt = targets[i]
+                new_cost = base + proximity[nxt] * weight
+                if seen[nxt] != generation or new_cost < g_score[nxt]:
+                    seen[nxt] = generation
+                    g_score[nxt] = new_cost
+                    parent[nxt] = current
+                    dx = nxt % n - ex
+                    dy = nxt // n - ey
+                    heappush(frontier, (new_cost + sqrt(dx * dx + dy * dy), new_cost, nxt))
+
+        self.expansions += expansions
+        if seen[target] != generation:
+            return []
+
+        path = []
+        current = target
+        while current != source:
+            path.append((current % n, current // n))
+            current = parent[current]
+        path.reverse()
+        return path
@@ -0,0 +1,343 @@
+import heapq
+from collections import deque
+
+from city_map import BUILDING
+
+INF = float('inf')
+
+NEIGHBOR_STEPS = [(0, 1), (1, 0), (0, -1), (-1, 0),
+                  (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+
+class HierarchicalPlanner:
+    """HPA*: A* over a graph of cluster entrances, refined segment by segment.
+
+    The grid is cut into ``cluster_size`` square clusters. Along every border
+    between two clusters, each run of cells free on both sides gets one
+    entrance pair (two, at its ends, when the run is long); the pair is
+    joined by a one-step inter-cluster edge. Entrance-to-entrance costs
+    inside a cluster are found by a breadth-first search bounded to that
+    cluster, computed the first time a search reaches it and cached, as is
+    the refined cell path of every segment a route has used.
+
+    A query connects start and goal to the entrances of their clusters,
+    searches the abstract graph, then stitches the cached segments
+    together. The start and goal legs are searched with the live obstacle
+    proximity costs of ``find_path()``; cached segments count steps only,
+    since obstacles move on long before a drone gets there.
+
+    ``building_added()`` keeps the hierarchy current: it redoes the borders
+    of the touched cluster and drops that cluster's cached costs, plus a
+    neighbour's when their shared entrances changed. Any other map change
+    (a new map version it did not see) rebuilds everything lazily.
+    """
+
+    def __init__(self, engine, cluster_size=16, obstacle_weight=2, long_run=6):
+        self.engine = engine
+        self.cluster_size = cluster_size
+        self.obstacle_weight = obstacle_weight
+        self.long_run = long_run
+        self.rebuilds = 0
+        self.cluster_updates = 0
+        self.expansions = 0
+        self.clear()
+
+    def clear(self):
+        self.version = None
+        self.blocked = None
+        self.entrances = {}   # cluster -> set of entrance cells
+        self.inter = {}       # entrance cell -> set of entrance cells across a border
+        self.borders = {}     # (cluster, cluster) -> list of (cell, cell) entrance pairs
+        self.intra = {}       # cluster -> {entrance: [(entrance, steps)]}, built lazily
+        self.segments = {}    # cluster -> {(entrance, entrance): cells}
+
+    # -- layout -----------------------------------------------------------
+
+    def cluster_of(self, cell):
+        n = self.engine.grid_size
+        size = self.cluster_size
+        columns = -(-n // size)
+        return (cell // n // size) * columns + (cell % n) // size
+
+    def bounds(self, cluster):
+        """Inclusive-exclusive (x0, y0, x1, y1) cell bounds of a cluster."""
+        n = self.engine.grid_size
+        size = self.cluster_size
+        columns = -(-n // size)
+        x0 = (cluster % columns) * size
+        y0 = (cluster // columns) * size
+        return x0, y0, min(x0 + size, n), min(y0 + size, n)
+
+    def refresh(self):
+        if self.version != self.engine.map_version:
+            self.rebuild()
+
+    def rebuild(self):
+        engine = self.engine
+        n = engine.grid_size
+        size = self.cluster_size
+        columns = -(-n // size)
+        self.clear()
+        self.blocked = bytearray((engine.grid == BUILDING).tobytes())
+        for cluster in range(columns * columns):
+            self.entrances[cluster] = set()
+        for cluster in range(columns * columns):
+            for _, key in self.adjacent(cluster):
+                if key[0] == cluster:
+                    self.set_border(*key)
+        self.version = engine.map_version
+        self.rebuilds += 1
+
+    def border_pairs(self, first, second):
+        """Entrance pairs between two adjacent clusters (``second`` right of or below ``first``)."""
+        n = self.engine.grid_size
+        blocked = self.blocked
+        x0, y0, x1, y1 = self.bounds(first)
+        if second == first + 1:
+            # Vertical border: first's last column against second's first
+            pairs = [(y * n + x1 - 1, y * n + x1) for y in range(y0, y1)]
+        else:
+            pairs = [((y1 - 1) * n + x, y1 * n + x) for x in range(x0, x1)]
+
+        entrances = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and not blocked[a] and not blocked[b]:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) >= self.long_run:
+                    entrances.extend((run[0], run[-1]))
+                else:
+                    entrances.append(run[len(run) // 2])
+                run = []
+        return entrances
+
+    def adjacent(self, cluster):
+        """(neighbour, border key) for each cluster sharing a border with ``cluster``."""
+        columns = -(-self.engine.grid_size // self.cluster_size)
+        cx, cy = cluster % columns, cluster // columns
+        if cx > 0:
+            yield cluster - 1, (cluster - 1, cluster)
+        if cx + 1 < columns:
+            yield cluster + 1, (cluster, cluster + 1)
+        if cy > 0:
+            yield cluster - columns, (cluster - columns, cluster)
+        if cy + 1 < columns:
+            yield cluster + columns, (cluster, cluster + columns)
+
+    def set_border(self, first, second):
+        """Recompute one border's entrances; returns whether they changed."""
+        old = self.borders.get((first, second), [])
+        new = self.border_pairs(first, second)
+        if new == old:
+            return False
+        for a, b in old:
+            self.inter[a].discard(b)
+            self.inter[b].discard(a)
+        self.borders[(first, second)] = new
+        for a, b in new:
+            self.inter.setdefault(a, set()).add(b)
+            self.inter.setdefault(b, set()).add(a)
+        for cluster in (first, second):
+            self.entrances[cluster] = {cell for other, key in self.adjacent(cluster)
+                                       for pair in self.borders.get(key, ())
+                                       for cell in pair if self.cluster_of(cell) == cluster}
+        return True
+
+    def building_added(self, x, y):
+        """Update the hierarchy for a new building; call after the map version moves on."""
+        engine = self.engine
+        if self.version is None or self.version != engine.map_version - 1:
+            return
+        cell = y * engine.grid_size + x
+        self.blocked[cell] = 1
+        cluster = self.cluster_of(cell)
+
+        touched = {cluster}
+        for other, key in self.adjacent(cluster):
+            if self.set_border(*key):
+                touched.add(other)
+        for other in touched:
+            self.intra.pop(other, None)
+            self.segments.pop(other, None)
+        self.cluster_updates += len(touched)
+        self.version = engine.map_version
+
+    # -- bounded searches ---------------------------------------------------
+
+    def local_search(self, cluster, source, live=False, goal=None):
+        """Costs and parents from source over the cells of one cluster.
+
+        Unit step costs by breadth-first search, or with ``live`` the
+        obstacle-aware costs of ``find_path()`` by Dijkstra, which stops
+        early once ``goal`` is settled.
+        """
+        n = self.engine.grid_size
+        blocked = self.blocked
+        x0, y0, x1, y1 = self.bounds(cluster)
+        dist = {source: 0}
+        parent = {source: source}
+
+        if not live:
+            queue = deque([source])
+            while queue:
+                cell = queue.popleft()
+                x, y = cell % n, cell // n
+                step = dist[cell] + 1
+                for dx, dy in NEIGHBOR_STEPS:
+                    nx, ny = x + dx, y + dy
+                    if x0 <= nx < x1 and y0 <= ny < y1:
+                        nxt = ny * n + nx
+                        if nxt not in dist and not blocked[nxt]:
+                            dist[nxt] = step
+                            parent[nxt] = cell
+                            queue.append(nxt)
+            return dist, parent
+
+        proximity = self.engine.obstacle_field.proximity
+        weight = self.obstacle_weight
+        frontier = [(0, source)]
+        while frontier:
+            cost, cell = heapq.heappop(frontier)
+            if cost != dist[cell]:
+                continue
+            if cell == goal:
+                break
+            x, y = cell % n, cell // n
+            for dx, dy in NEIGHBOR_STEPS:
+                nx, ny = x + dx, y + dy
+                if x0 <= nx < x1 and y0 <= ny < y1:
+                    nxt = ny * n + nx
+                    if blocked[nxt]:
+                        continue
+                    through = cost + 1 + proximity[nxt] * weight
+                    if through < dist.get(nxt, INF):
+                        dist[nxt] = through
+                        parent[nxt] = cell
+                        heapq.heappush(frontier, (through, nxt))
+        return dist, parent
+
+    @staticmethod
+    def trace(parent, source, target):
+        cells = []
+        cell = target
+        while cell != source:
+            cells.append(cell)
+            cell = parent[cell]
+        cells.reverse()
+        return cells
+
+    def intra_edges(self, cluster):
+        edges = self.intra.get(cluster)
+        if edges is None:
+            edges = {}
+            entrances = self.entrances[cluster]
+            for source in entrances:
+                dist, _ = self.local_search(cluster, source)
+                edges[source] = [(other, dist[other]) for other in entrances
+                                 if other != source and other in dist]
+            self.intra[cluster] = edges
+        return edges
+
+    def segment(self, cluster, a, b):
+        cache = self.segments.setdefault(cluster, {})
+        cells = cache.get((a, b))
+        if cells is None:
+            _, parent = self.local_search(cluster, a)
+            cells = cache[(a, b)] = self.trace(parent, a, b)
+        return cells
+
+    # -- queries ------------------------------------------------------------
+
+    def find_path(self, start, end):
+        """Return the cells from start (exclusive) to end, or [] if unreachable."""
+        self.refresh()
+        n = self.engine.grid_size
+        sx, sy = start
+        ex, ey = end
+        if not (0 <= sx < n and 0 <= sy < n and 0 <= ex < n and 0 <= ey < n):
+            return []
+        source = sy * n + sx
+        target = ey * n + ex
+        if source == target or self.blocked[target]:
+            return []
+
+        first = self.cluster_of(source)
+        last = self.cluster_of(target)
+        start_dist, start_parent = self.local_search(first, source, live=True)
+        if first == last and target in start_dist:
+            return self.cells(self.trace(start_parent, source, target))
+
+        # Reverse unit costs from the goal to its cluster's entrances
+        goal_dist, _ = self.local_search(last, target)
+        route = self.abstract_search(source, target, first, last, start_dist, goal_dist)
+        if route is None:
+            return []
+        return self.cells(self.refine(route, source, target, first, last, start_parent))
+
+    def abstract_search(self, source, target, first, last, start_dist, goal_dist):
+        n = self.engine.grid_size
+        tx, ty = target % n, target // n
+        inter = self.inter
+
+        def heuristic(cell):
+            return max(abs(cell % n - tx), abs(cell // n - ty))
+
+        g = {source: 0}
+        parent = {source: None}
+        frontier = [(heuristic(source), 0, source)]
+        expansions = 0
+        while frontier:
+            _, cost, cell = heapq.heappop(frontier)
+            if cost != g[cell]:
+                continue
+            if cell == target:
+                break
+            expansions += 1
+
+            if cell == source:
+                moves = [(other, start_dist[other]) for other in self.entrances[first]
+                         if other in start_dist]
+                moves.extend((other, 1) for other in inter.get(cell, ()))
+            else:
+                cluster = self.cluster_of(cell)
+                moves = list(self.intra_edges(cluster).get(cell, ()))
+                moves.extend((other, 1) for other in inter.get(cell, ()))
+                if cluster == last and cell in goal_dist:
+                    moves.append((target, goal_dist[cell]))
+            for nxt, step in moves:
+                through = cost + step
+                if through < g.get(nxt, INF):
+                    g[nxt] = through
+                    parent[nxt] = cell
+                    heapq.heappush(frontier, (through + heuristic(nxt), through, nxt))
+        self.expansions += expansions
+
+        if target not in parent:
+            return None
+        route = []
+        cell = target
+        while cell is not None:
+            route.append(cell)
+            cell = parent[cell]
+        route.reverse()
+        return route
+
+    def refine(self, route, source, target, first, last, start_parent):
+        cells = []
+        for a, b in zip(route, route[1:]):
+            if b in self.inter.get(a, ()):
+                cells.append(b)
+            elif a == source:
+                cells.extend(self.trace(start_parent, source, b))
+            elif b == target:
+                _, parent = self.local_search(last, a, live=True, goal=target)
+                cells.extend(self.trace(parent, a, target))
+            else:
+                cells.extend(self.segment(self.cluster_of(a), a, b))
+        return cells
+
+    def cells(self, flat):
+        n = self.engine.grid_size
+        return [(cell % n, cell // n) for cell in flat]
@@ -0,0 +1,220 @@
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+# Padded grid cell states
+FREE = 0
+WALL = 1
+EDGE = 2
+
+
+class JumpPointSearch:
+    """Jump Point Search over the planner grid, with plain A* where costs vary.
+
+    Entering a cell costs ``1 + obstacle_weight * proximity`` as in
+    ``GridAStar``, so costs are uniform wherever no obstacle is near. A cell
+    is "rough" when it or one of its eight neighbours has non-zero
+    proximity. Away from rough cells the search keeps only the natural and
+    forced neighbours of each node (diagonal moves may pass building
+    corners, as ``GridAStar`` allows) and jumps along straight and diagonal
+    lines, stopping at the goal, a forced neighbour or a rough cell. Rough
+    cells, and the start, are expanded with all eight neighbours like
+    ordinary A*. The pruning is exact in the uniform parts, so paths are
+    optimal for the same costs. Jumps are filled back in, so the returned
+    path steps one cell at a time.
+
+    Jumps scan a copy of the grid padded with an ``EDGE`` border, so the
+    inner loops need no bounds checks. The padded grid follows the
+    planner's building layout and the rough mask is rebuilt whenever the
+    cost change log has moved on.
+    """
+
+    def __init__(self, astar, obstacle_field, log, obstacle_weight=2):
+        self.astar = astar
+        self.obstacle_field = obstacle_field
+        self.log = log
+        self.obstacle_weight = obstacle_weight
+        self.cells = None
+        self.cells_source = None
+        self.rough = None
+        self.rough_epoch = None
+        self.expansions = 0
+        self.jumped = 0
+        self.searches = 0
+
+    def padded_cells(self):
+        blocked = self.astar.blocked
+        if self.cells is None or self.cells_source is not blocked:
+            n = self.astar.grid_size
+            cells = np.full((n + 2, n + 2), EDGE, dtype=np.uint8)
+            cells[1:-1, 1:-1] = np.frombuffer(blocked, dtype=np.uint8).reshape(n, n)
+            self.cells = bytearray(cells.tobytes())
+            self.cells_source = blocked
+        return self.cells
+
+    def rough_mask(self):
+        if self.rough is None or self.rough_epoch != self.log.epoch:
+            n = self.astar.grid_size
+            near = self.obstacle_field.proximity_array.reshape(n, n) > 0
+            rough = np.zeros((n + 2, n + 2), dtype=bool)
+            inner = rough[1:-1, 1:-1]
+            inner |= near
+            inner[1:, :] |= near[:-1, :]
+            inner[:-1, :] |= near[1:, :]
+            wide = inner.copy()
+            inner[:, 1:] |= wide[:, :-1]
+            inner[:, :-1] |= wide[:, 1:]
+            self.rough = bytearray(rough.tobytes())
+            self.rough_epoch = self.log.epoch
+        return self.rough
+
+    def find_path(self, start, end, grid):
+        """Return the cells from start (exclusive) to end, or [] if unreachable."""
+        astar = self.astar
+        astar.blocked_mask(grid)
+        n = astar.grid_size
+        sx, sy = start
+        ex, ey = end
+        if not (0 <= sx < n and 0 <= sy < n and 0 <= ex < n and 0 <= ey < n):
+            return []
+        if astar.blocked[ey * n + ex]:
+            return []
+
+        # Everything below works on padded indices: (y + 1) * m + (x + 1).
+        # Offsets are dx in {-1, 0, 1} and dy in {-m, 0, m}.
+        m = n + 2
+        cells = self.padded_cells()
+        rough = self.rough_mask()
+        proximity = self.obstacle_field.proximity
+        weight = self.obstacle_weight
+        source = (sy + 1) * m + sx + 1
+        target = (ey + 1) * m + ex + 1
+        tx, ty = ex + 1, ey + 1
+        self.searches += 1
+        jumped = 0
+
+        def jump_straight(cell, step, side):
+            # ``side`` is the offset to the cells on either side of the line
+            nonlocal jumped
+            while True:
+                cell += step
+                if cells[cell]:
+                    return -1
+                jumped += 1
+                if cell == target or rough[cell]:
+                    return cell
+                if ((cells[cell + side] == WALL and cells[cell + side + step] == FREE) or
+                        (cells[cell - side] == WALL and cells[cell - side + step] == FREE)):
+                    return cell
+
+        def jump_diagonal(cell, dx, dy):
+            nonlocal jumped
+            step = dx + dy
+            while True:
+                cell += step
+                if cells[cell]:
+                    return -1
+                jumped += 1
+                if cell == target or rough[cell]:
+                    return cell
+                if ((cells[cell - dx] == WALL and cells[cell - dx + dy] == FREE) or
+                        (cells[cell - dy] == WALL and cells[cell + dx - dy] == FREE)):
+                    return cell
+                if jump_straight(cell, dx, m) != -1 or jump_straight(cell, dy, 1) != -1:
+                    return cell
+
+        def jump(cell, dx, dy):
+            if dx and dy:
+                return jump_diagonal(cell, dx, dy)
+            if dx:
+                return jump_straight(cell, dx, m)
+            return jump_straight(cell, dy, 1)
+
+        def directions(cell, dx, dy):
+            """Natural and forced offsets out of a uniform node entered moving (dx, dy)."""
+            if dx and dy:
+                found = [(dx, 0), (0, dy), (dx, dy)]
+                if cells[cell - dx] == WALL:
+                    found.append((-dx, dy))
+                if cells[cell - dy] == WALL:
+                    found.append((dx, -dy))
+            elif dx:
+                found = [(dx, 0)]
+                if cells[cell + m] == WALL:
+                    found.append((dx, m))
+                if cells[cell - m] == WALL:
+                    found.append((dx, -m))
+            else:
+                found = [(0, dy)]
+                if cells[cell + 1] == WALL:
+                    found.append((1, dy))
+                if cells[cell - 1] == WALL:
+                    found.append((-1, dy))
+            return found
+
+        neighbours = [dx + dy * m for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+        # Heap entries are (f, -g, cell): among equal f the deeper node goes
+        # first, which keeps the search off the wide plateaus of equal-cost
+        # paths that unit-cost diagonals create
+        g_score = {source: 0}
+        parent = {source: source}
+        frontier = [(0, 0, source)]
+        expansions = 0
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        while frontier:
+            _, cost, current = heappop(frontier)
+            cost = -cost
+            if cost != g_score[current]:
+                continue
+            expansions += 1
+            if current == target:
+                break
+
+            x, y = current % m, current // m
+            if current == source or rough[current]:
+                successors = [current + offset for offset in neighbours if not cells[current + offset]]
+            else:
+                previous = parent[current]
+                px, py = previous % m, previous // m
+                dx = (x > px) - (x < px)
+                dy = ((y > py) - (y < py)) * m
+                successors = []
+                for ddx, ddy in directions(current, dx, dy):
+                    found = jump(current, ddx, ddy)
+                    if found != -1:
+                        successors.append(found)
+
+            for nxt in successors:
+                nx, ny = nxt % m, nxt // m
+                new_cost = cost + max(abs(nx - x), abs(ny - y)) + proximity[(ny - 1) * n + nx - 1] * weight
+                if new_cost < g_score.get(nxt, INF):
+                    g_score[nxt] = new_cost
+                    parent[nxt] = current
+                    heappush(frontier, (new_cost + max(abs(nx - tx), abs(ny - ty)), -new_cost, nxt))
+
+        self.expansions += expansions
+        self.jumped += jumped
+        if target not in parent:
+            return []
+
+        # Fill in the straight and diagonal runs between jump points
+        path = []
+        current = target
+        while current != source:
+            previous = parent[current]
+            x, y = current % m, current // m
+            px, py = previous % m, previous // m
+            dx = (px > x) - (px < x)
+            dy = (py > y) - (py < y)
+            while (x, y) != (px, py):
+                path.append((x - 1, y - 1))
+                x += dx
+                y += dy
+            current = previous
+        path.reverse()
+        return path
@@ -0,0 +1,149 @@
+from array import array
+
+import numpy as np
+
+
+class ObstacleField:
+    """Incrementally maintained obstacle occupancy and proximity counts.
+
+    ``occupancy`` is an (n, n) array with the number of obstacles on each
+    cell. ``proximity_array`` holds, per flat cell ``y * grid_size + x``, the
+    number of obstacles inside the (2 * radius + 1) square box centred on it,
+    so the usual proximity query is a single lookup. ``proximity`` mirrors it
+    as an ``array('i')`` for the scalar hot loops in the planners, which
+    index it faster than the NumPy array.
+
+    Updates are applied in batches by ``apply()``: each removed or added
+    obstacle adds -1/+1 over its box, and the mirror is patched cell by
+    cell, or copied whole when a batch touches a large part of the grid.
+    """
+
+    def __init__(self, grid_size, radius=2, log=None):
+        self.grid_size = grid_size
+        self.radius = radius
+        self.log = log
+        span = np.arange(-radius, radius + 1)
+        self.box_dx = np.tile(span, len(span))
+        self.box_dy = np.repeat(span, len(span))
+        self.clear()
+
+    def clear(self):
+        n = self.grid_size
+        self.occupancy = np.zeros((n, n), dtype=np.int32)
+        self.proximity_array = np.zeros(n * n, dtype=np.int32)
+        self.proximity = array('i', [0]) * (n * n)
+
+    def apply(self, removed=None, added=None):
+        """Remove and add obstacles given as (k, 2) arrays of (x, y) cells."""
+        batches = []
+        if removed is not None and len(removed):
+            batches.append((np.asarray(removed), -1))
+        if added is not None and len(added):
+            batches.append((np.asarray(added), 1))
+        if not batches:
+            return
+
+        n = self.grid_size
+        size = n * n
+        touched = []
+        for cells, delta in batches:
+            xs = cells[:, 0]
+            ys = cells[:, 1]
+            bx = xs[:, None] + self.box_dx
+            by = ys[:, None] + self.box_dy
+            inside = (bx >= 0) & (bx < n) & (by >= 0) & (by < n)
+            flat = (by * n + bx)[inside]
+
+            if len(flat) * 16 > size:
+                # Large batches: dense counting beats scattered updates
+                occupancy = np.bincount(ys * n + xs, minlength=size).reshape(n, n)
+                self.occupancy += (delta * occupancy).astype(np.int32)
+                counts = np.bincount(flat, minlength=size)
+                self.proximity_array += (delta * counts).astype(np.int32)
+                touched.append(np.flatnonzero(counts))
+            else:
+                np.add.at(self.occupancy, (ys, xs), delta)
+                np.add.at(self.proximity_array, flat, delta)
+                touched.append(np.unique(flat))
+
+            if self.log is not None:
+                radius = self.radius
+                self.log.extend((x, y, radius) for x, y in zip(xs.tolist(), ys.tolist()))
+
+        touched = touched[0] if len(touched) == 1 else np.union1d(*touched)
+        if len(touched) * 4 > size:
+            self.proximity = array('i', self.proximity_array.tobytes())
+        else:
+            proximity = self.proximity
+            for i, value in zip(touched.tolist(), self.proximity_array[touched].tolist()):
+                proximity[i] = value
+
+    def add(self, x, y):
+        self.apply(added=np.array([[x, y]]))
+
+    def remove(self, x, y):
+        self.apply(removed=np.array([[x, y]]))
+
+    def move(self, old_x, old_y, new_x, new_y):
+        if (old_x, old_y) == (new_x, new_y):
+            return
+        self.apply(np.array([[old_x, old_y]]), np.array([[new_x, new_y]]))
+
+    def count(self, x, y, radius=None):
+        """Number of obstacles within ``radius`` (Chebyshev) of the cell."""
+        n = self.grid_size
+        if radius is None or radius == self.radius:
+            if 0 <= x < n and 0 <= y < n:
+                return self.proximity[y * n + x]
+            radius = self.radius
+
+        # Other radii (or off-grid cells) sum the occupancy box instead
+        x0, x1 = max(0, x - radius), min(n - 1, x + radius)
+        y0, y1 = max(0, y - radius), min(n - 1, y + radius)
+        if x0 > x1 or y0 > y1:
+            return 0
+        return int(self.occupancy[y0:y1 + 1, x0:x1 + 1].sum())
+
+
+class CostChangeLog:
+    """Append-only record of cells whose traversal cost changed.
+
+    Each entry is ``(x, y, radius)``: every cell within ``radius`` of (x, y)
+    may have a new cost. Consumers keep a cursor (the ``epoch`` they last
+    saw) and read newer entries with ``since()``. Old entries are trimmed
+    once the log grows past ``max_entries``; a cursor older than the trimmed
+    base gets ``None`` and must fall back to a full replan.
+    """
+
+    def __init__(self, max_entries=65536):
+        self.max_entries = max_entries
+        self.entries = []
+        self.base = 0
+
+    @property
+    def epoch(self):
+        return self.base + len(self.entries)
+
+    def record(self, x, y, radius=0):
+        self.entries.append((x, y, radius))
+        self._trim()
+
+    def extend(self, entries):
+        self.entries.extend(entries)
+        self._trim()
+
+    def _trim(self):
+        if len(self.entries) > self.max_entries:
+            drop = len(self.entries) // 2
+            del self.entries[:drop]
+            self.base += drop
+
+    def since(self, cursor):
+        if cursor < self.base:
+            return None
+        return self.entries[cursor - self.base:]
+
+    def reset(self):
+        """Invalidate every outstanding cursor (e.g. after the map is cleared)."""
+        self.base = self.epoch + 1
+        self.entries = []
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class ParticlePool:
+    """Fixed-capacity particle store backed by NumPy arrays.
+
+    Particles live in preallocated slots handed out from a free-index stack,
+    so bursts never allocate. ``update()`` integrates and culls every live
+    particle in one vectorized pass. When the pool is full, further
+    particles in a burst are dropped (and counted) rather than growing it.
+    Each particle fades with its own ``life`` and also dies once its burst's
+    ``ttl`` runs out, matching the old per-system lifetime.
+    """
+
+    def __init__(self, capacity=4096, rng=None):
+        self.capacity = capacity
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.ttl = np.zeros(capacity, dtype=np.int16)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = capacity
+        self.dropped = 0
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def clear(self):
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = self.capacity
+
+    def emit(self, x, y, color, count=20, life=(20, 40), ttl=30, speed=(0.5, 2.0)):
+        """Spawn a burst of ``count`` particles at pixel position (x, y)."""
+        take = min(count, self.free_count)
+        self.dropped += count - take
+        if not take:
+            return
+        self.free_count -= take
+        slots = self.free[self.free_count:self.free_count + take]
+
+        rng = self.rng
+        angle = rng.uniform(0, 2 * np.pi, take)
+        velocity = rng.uniform(speed[0], speed[1], take)
+        self.pos[slots] = (x, y)
+        self.vel[slots, 0] = velocity * np.cos(angle)
+        self.vel[slots, 1] = velocity * np.sin(angle)
+        self.life[slots] = rng.integers(life[0], life[1], take, endpoint=True)
+        self.ttl[slots] = ttl
+        self.color[slots] = color
+        self.alive[slots] = True
+
+    def update(self):
+        slots = np.flatnonzero(self.alive)
+        if not len(slots):
+            return
+        self.pos[slots] += self.vel[slots]
+        self.life[slots] -= 1
+        self.ttl[slots] -= 1
+
+        dead = slots[(self.life[slots] <= 0) | (self.ttl[slots] <= 0)]
+        if len(dead):
+            self.alive[dead] = False
+            self.free[self.free_count:self.free_count + len(dead)] = dead
+            self.free_count += len(dead)
+
+    def active(self):
+        """Positions, colors and alphas of live particles as arrays."""
+        slots = np.flatnonzero(self.alive)
+        alpha = np.minimum(255, self.life[slots].astype(np.int32) * 8).astype(np.uint8)
+        return self.pos[slots], self.color[slots], alpha
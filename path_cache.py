@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+
+class PathCache:
+    """LRU cache of planned paths keyed by endpoints, map version and cost epoch.
+
+    Only the newest path per (start, end) pair is kept, stamped with the
+    static map version and the cost change log epoch it was planned at. A
+    lookup at the same version and epoch is a plain hit. If only the epoch
+    moved on, the log entries since then are checked: when every changed cell
+    lies more than ``reuse_margin`` cells outside the path's bounding box the
+    path is reused (a partial hit) and re-stamped with the current epoch.
+    """
+
+    def __init__(self, max_size=1024, reuse_margin=3, max_scan=4096):
+        self.max_size = max_size
+        self.reuse_margin = reuse_margin
+        self.max_scan = max_scan
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'partial_hits': self.partial_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.partial_hits) / lookups if lookups else 0.0,
+        }
+
+    def get(self, start, end, map_version, log):
+        """Return a fresh copy of the cached path, or None on a miss."""
+        key = (start, end)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != map_version:
+            self.misses += 1
+            return None
+
+        _, epoch, path, bounds = entry
+        if epoch != log.epoch:
+            changes = log.since(epoch)
+            if changes is None or len(changes) > self.max_scan or self._touches(bounds, changes):
+                self.misses += 1
+                return None
+            self.entries[key] = (map_version, log.epoch, path, bounds)
+            self.partial_hits += 1
+        else:
+            self.hits += 1
+
+        self.entries.move_to_end(key)
+        return list(path)
+
+    def put(self, start, end, map_version, epoch, path):
+        if self.max_size <= 0:
+            return
+        cells = [start, end]
+        cells.extend(path)
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        margin = self.reuse_margin
+        bounds = (min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin)
+
+        key = (start, end)
+        self.entries[key] = (map_version, epoch, tuple(path), bounds)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _touches(self, bounds, changes):
+        x0, y0, x1, y1 = bounds
+        for x, y, radius in changes:
+            if x + radius >= x0 and x - radius <= x1 and y + radius >= y0 and y - radius <= y1:
+                return True
+        return False
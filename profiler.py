@@ -0,0 +1,122 @@
+import json
+import time
+
+import numpy as np
+
+# Histogram bucket edges in milliseconds (log-spaced, 1 us .. 10 s)
+HISTOGRAM_EDGES_MS = np.logspace(-3, 4, 29)
+
+
+class RollingWindow:
+    """The most recent ``size`` samples of one series, in a NumPy ring."""
+
+    def __init__(self, size):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.next = 0
+        self.filled = 0
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.next] = value
+        self.next = (self.next + 1) % len(self.values)
+        if self.filled < len(self.values):
+            self.filled += 1
+        self.total += value
+        self.count += 1
+
+    def samples(self):
+        return self.values[:self.filled]
+
+    def histogram(self, edges=HISTOGRAM_EDGES_MS, scale=1000.0):
+        counts, _ = np.histogram(self.samples() * scale, bins=edges)
+        return counts
+
+    def summary(self, scale=1.0):
+        samples = self.samples() * scale
+        if not len(samples):
+            return {'count': self.count}
+        return {
+            'count': self.count,
+            'mean': float(samples.mean()),
+            'p50': float(np.percentile(samples, 50)),
+            'p95': float(np.percentile(samples, 95)),
+            'max': float(samples.max()),
+        }
+
+
+class TickProfiler:
+    """Per-stage timers and per-tick counters over a rolling window of ticks.
+
+    The engine and viewer only route their stages through ``run()`` while a
+    profiler is attached (``engine.profiler``); without one the hot paths are
+    untouched. Counters are sampled once per tick from the engine's existing
+    running totals (A* expansions, replans, path cache hits, ...), so they
+    add nothing to the inner loops. If ``dump_path`` is set, a JSON line
+    with the window's summary is appended every ``dump_interval`` ticks.
+    """
+
+    def __init__(self, window=600, dump_path=None, dump_interval=600):
+        self.window = window
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.stages = {}
+        self.counters = {}
+        self.totals = {}
+        self.ticks = 0
+
+    def run(self, stage, fn, *args):
+        """Call fn(*args), adding its wall time to ``stage``; returns its result."""
+        started = time.perf_counter()
+        result = fn(*args)
+        self.record(stage, time.perf_counter() - started)
+        return result
+
+    def record(self, stage, seconds):
+        series = self.stages.get(stage)
+        if series is None:
+            series = self.stages[stage] = RollingWindow(self.window)
+        series.add(seconds)
+
+    def end_tick(self, totals, tick=None):
+        """Record per-tick deltas of the running ``totals`` and dump if due."""
+        for name, value in totals.items():
+            previous = self.totals.get(name, value)
+            series = self.counters.get(name)
+            if series is None:
+                series = self.counters[name] = RollingWindow(self.window)
+            series.add(value - previous)
+            self.totals[name] = value
+        self.ticks += 1
+        if self.dump_path and self.ticks % self.dump_interval == 0:
+            self.dump(tick)
+
+    def summary(self):
+        """Stage times in milliseconds and counters per tick over the window."""
+        return {
+            'ticks': self.ticks,
+            'stages': {name: series.summary(1000.0) for name, series in self.stages.items()},
+            'counters': {name: series.summary() for name, series in self.counters.items()},
+        }
+
+    def histograms(self):
+        """Counts per ``HISTOGRAM_EDGES_MS`` bucket for every stage."""
+        return {name: series.histogram().tolist() for name, series in self.stages.items()}
+
+    def dump(self, tick=None):
+        record = self.summary()
+        record['tick'] = tick
+        record['time'] = time.time()
+        record['histograms'] = self.histograms()
+        with open(self.dump_path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+    def slowest(self, count=8):
+        """(stage, mean ms, p95 ms) of the stages with the highest mean time."""
+        rows = []
+        for name, series in self.stages.items():
+            stats = series.summary(1000.0)
+            if 'mean' in stats:
+                rows.append((name, stats['mean'], stats['p95']))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:count]
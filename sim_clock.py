@@ -0,0 +1,47 @@
+import time
+
+MIN_TIME_SCALE = 0.5
+MAX_TIME_SCALE = 1000.0
+
+
+class SimClock:
+    """Fixed-timestep clock turning elapsed real time into whole sim ticks.
+
+    Real time since the last ``advance()`` is multiplied by ``time_scale``
+    and added to an accumulator; every full ``1 / tick_rate`` seconds in it
+    becomes one tick, and the remainder carries over to the next frame. The
+    simulation always advances in identical ticks, so a run at 100x or in
+    fast-forward behaves exactly like one at 1x. If the backlog exceeds
+    ``max_ticks`` (the host can't keep up), the excess is discarded and
+    counted in ``dropped_ticks`` instead of snowballing.
+    """
+
+    def __init__(self, tick_rate=60, time_scale=1.0, max_ticks=2000):
+        self.tick_rate = tick_rate
+        self.max_ticks = max_ticks
+        self.time_scale = 1.0
+        self.set_time_scale(time_scale)
+        self.fast_forward = False
+        self.dropped_ticks = 0
+        self.reset()
+
+    def reset(self):
+        self.last = time.perf_counter()
+        self.accumulator = 0.0
+
+    def set_time_scale(self, scale):
+        self.time_scale = min(MAX_TIME_SCALE, max(MIN_TIME_SCALE, scale))
+        return self.time_scale
+
+    def advance(self, now=None):
+        """Return the number of ticks due since the previous call."""
+        now = time.perf_counter() if now is None else now
+        self.accumulator += (now - self.last) * self.time_scale * self.tick_rate
+        self.last = now
+
+        ticks = int(self.accumulator)
+        self.accumulator -= ticks
+        if ticks > self.max_ticks:
+            self.dropped_ticks += ticks - self.max_ticks
+            ticks = self.max_ticks
+        return ticks
@@ -0,0 +1,870 @@
+import random
+import csv
+import time
+import math
+from array import array
+
+import numpy as np
+
+from obstacle_field import ObstacleField, CostChangeLog
+from grid_astar import GridAStar
+from path_cache import PathCache
+from distance_field import DistanceFields
+from dispatcher import Dispatcher
+from cooperative import CooperativePlanner
+from forecast import ObstacleForecast
+from hpa import HierarchicalPlanner
+from jps import JumpPointSearch
+from entity_arrays import DroneArrays, ObstacleArrays
+from alerts import AlertFileReader, AlertChannel
+from event_log import (EventLog, DRONE_CREATED, DRONE_REPLANNED, DRONE_MOVED,
+                       DRONE_DELIVERED, OBSTACLE_SPAWNED)
+from snapshot import save_snapshot, load_snapshot, snapshot_grid_size
+from city_map import EMPTY, HOSPITAL, BUILDING, load_map, save_map
+from profiler import TickProfiler
+
+# Constants
+GRID_SIZE = 25
+TICK_RATE = 60  # sim ticks per simulated second
+OBSTACLE_TURN_PROBABILITY = 0.15  # per obstacle move
+
+# Entity types (EMPTY, HOSPITAL and BUILDING are the map cell codes from city_map)
+DRONE = 3
+OBSTACLE = 4
+
+# Effect kinds emitted for viewers (particle bursts etc.)
+EFFECT_HOSPITAL_ADDED = 'hospital_added'
+EFFECT_OBSTACLE_CROSSING = 'obstacle_crossing'
+EFFECT_DELIVERY = 'delivery'
+
+
+def _run_stage(stage, fn):
+    """Untimed stand-in for TickProfiler.run."""
+    return fn()
+
+
+class SimulationEngine:
+    """Headless simulation state and stepping, independent of any display."""
+
+    def __init__(self, grid_size=GRID_SIZE, alert_file="simulation_alerts.csv", path_cache_size=1024,
+                 seed=None):
+        self.grid_size = grid_size
+
+        # All sim randomness comes from these two generators, so with a seed
+        # the run is deterministic.
+        self.seed = seed
+        self.deterministic = seed is not None
+        self.random = random.Random(seed)
+        self.np_random = np.random.default_rng(seed)
+
+        # Initialize components
+        self.grid = np.zeros((grid_size, grid_size), dtype=np.uint8)
+        self.hospitals = {}
+        self.hospital_positions = {}
+        self._buildings = None
+        self.drones = DroneArrays()
+        self.obstacles = ObstacleArrays()
+        self._hospital_mask = None
+        self.cost_log = CostChangeLog()
+        self.obstacle_field = ObstacleField(grid_size, log=self.cost_log)
+        self.astar = GridAStar(grid_size, self.obstacle_field)
+        self.jps = JumpPointSearch(self.astar, self.obstacle_field, self.cost_log)
+        self.path_cache = PathCache(path_cache_size)
+        self.distance_fields = DistanceFields(self)
+        self.dispatcher = Dispatcher(self)
+        self.cooperative = CooperativePlanner(self)
+        self.forecast = ObstacleForecast(self, OBSTACLE_TURN_PROBABILITY)
+        self.hierarchy = HierarchicalPlanner(self)
+        self.map_version = 0
+
+        # Hospital supplies and needs
+        self.possible_supplies = {
+            'Medical': {'production': 10, 'consumption': 5},
+            'Blood': {'production': 8, 'consumption': 4},
+            'Equipment': {'production': 5, 'consumption': 3},
+            'Supplies': {'production': 7, 'consumption': 4}
+        }
+
+        self.possible_needs = list(self.possible_supplies.keys())
+
+        # Stats tracking
+        self.total_deliveries = 0
+        self.active_routes = 0
+        self.emergency_count = 0
+        self.tick_count = 0
+        self.replan_count = 0
+        # Drone move rounds so far; the time axis of cooperative reservations
+        self.move_step = 0
+        # Ticks from dispatch to delivery of every completed delivery
+        self.delivery_latencies = array('q')
+
+        # State management
+        self.simulation_running = False
+        self.active_hospital_drones = set()
+
+        # Timing controls (in ticks of 1 / TICK_RATE simulated seconds)
+        self.drone_move_timer = 0
+        self.drone_move_interval = 2
+        self.obstacle_spawn_timer = 0
+        self.obstacle_spawn_interval = 4
+        self.obstacle_move_timer = 0
+        self.obstacle_move_interval = 6
+        self.max_obstacles = 200
+
+        # Route to hospitals by descending per-hospital distance fields instead
+        self.use_distance_fields = False
+        # Pick origins and destinations by min-cost assignment instead of at random
+        self.use_dispatcher = False
+        # Plan drones against each other's space-time reservations so no two
+        # share a cell on the same move step
+        self.use_cooperative = False
+        # Plan through time around forecast obstacle positions, this many
+        # ticks ahead
+        self.use_forecast = False
+        self.forecast_horizon = 48
+        # Route by HPA* over cluster entrances, for city-scale grids
+        self.use_hierarchical = False
+        # Search by Jump Point Search, pruning symmetric moves where no
+        # obstacle is near
+        self.use_jps = False
+
+        # Setup
+        self.alert_file = alert_file
+        self.alert_reader = AlertFileReader(alert_file) if alert_file else None
+        self.processed_alert_ids = set()
+        # Active file alerts by ID that could not be served yet (e.g. a
+        # hospital not placed yet); retried on every poll
+        self.pending_alerts = {}
+        self.create_alert_file()
+        # External producer threads publish here; the tick drains it on the sim thread
+        self.alert_channel = AlertChannel()
+        # Ticks until the next generated alert (None: generator off). Counting
+        # sim ticks keeps the alert rate per simulated hour the same at any
+        # time scale or in fast-forward.
+        self.alert_ticks_left = None
+        self.deploy_count = 1
+        self.deploy_active = False
+        self.deploy_timer = 0
+        self.deploy_interval = TICK_RATE  # 1 simulated second
+
+        # Called as on_effect(kind, pos) so a viewer can add particles
+        self.on_effect = None
+        # Optional EventLog recording dispatches, moves and deliveries
+        self.event_log = None
+        # Optional TickProfiler timing each tick stage
+        self.profiler = None
+
+    def emit_effect(self, kind, pos):
+        if self.on_effect is not None:
+            self.on_effect(kind, pos)
+
+    def create_alert_file(self):
+        if not self.alert_file:
+            return
+        with open(self.alert_file, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['ID', 'Timestamp', 'Type', 'Origin', 'Destination', 'Status'])
+        self.alert_reader.reset()
+        self.processed_alert_ids.clear()
+        self.pending_alerts.clear()
+
+    def process_alerts(self):
+        if not self.alert_reader:
+            return
+
+        try:
+            pending = self.pending_alerts
+            for alert in self.alert_reader.read_new():
+                if alert['ID'] not in self.processed_alert_ids:
+                    pending[alert['ID']] = alert
+
+            # An alert counts as processed once it is consumed: it launched a
+            # drone, or it is not Active. Anything else is retried next poll.
+            for alert_id, alert in list(pending.items()):
+                if alert.get('Status') == 'Active':
+                    if alert_id in self.drones.slot_by_id:
+                        continue
+                    origin_hospital = self.hospital_positions.get(alert.get('Origin'))
+                    dest_hospital = self.hospital_positions.get(alert.get('Destination'))
+                    if not (origin_hospital and dest_hospital):
+                        continue
+                    slot = self.drones.add(alert_id, origin_hospital, dest_hospital,
+                                           self.initial_path(origin_hospital, dest_hospital),
+                                           alert['Origin'], alert.get('Type'), self.tick_count)
+                    self.route_new_drone(slot)
+                    self.log_drone_created(slot)
+                del pending[alert_id]
+                self.processed_alert_ids.add(alert_id)
+        except (FileNotFoundError, KeyError, UnicodeDecodeError, csv.Error) as e:
+            print(f"Error processing alerts: {e}")
+
+    def generate_tick_alerts(self):
+        """Publish a dispatch request every 2-4 simulated seconds."""
+        if self.alert_ticks_left is None:
+            return
+        if self.alert_ticks_left <= 0:
+            self.publish_alert({'Source': 'generator'})
+            self.alert_ticks_left = self.random.randint(2, 4) * TICK_RATE
+        self.alert_ticks_left -= 1
+
+    def publish_alert(self, alert, timeout=None):
+        """Thread-safe entry point for alert producers.
+
+        ``alert`` may name 'Origin' and 'Destination' hospital IDs (and a
+        supply 'Type'); without them the hospitals are picked when the alert
+        is handled. Returns False if the channel stayed full for ``timeout``.
+        """
+        return self.alert_channel.put(alert, timeout=timeout)
+
+    def drain_alerts(self):
+        for alert in self.alert_channel.drain():
+            self.handle_alert(alert)
+
+    def handle_alert(self, alert):
+        if 'Origin' in alert and 'Destination' in alert:
+            origin_pos = self.hospital_positions.get(alert['Origin'])
+            dest_pos = self.hospital_positions.get(alert['Destination'])
+            if origin_pos is None or dest_pos is None or origin_pos == dest_pos:
+                return
+            origin_hospital = self.hospitals[origin_pos]
+            dest_hospital = self.hospitals[dest_pos]
+            supply_type = alert.get('Type') or next(iter(dest_hospital['needs']), None)
+            if supply_type and origin_hospital['drones'] < 3:
+                self.create_new_drone(origin_hospital, origin_pos, dest_hospital, dest_pos, supply_type)
+            return
+
+        if self.use_dispatcher:
+            self.dispatcher.dispatch(limit=1)
+            return
+        if len(self.hospitals) < 2:
+            return
+        available_hospitals = []
+        destination_hospitals = []
+
+        for pos, hospital in self.hospitals.items():
+            if hospital['drones'] < 3:
+                available_hospitals.append((pos, hospital))
+            if hospital['needs']:
+                destination_hospitals.append((pos, hospital))
+
+        if available_hospitals and destination_hospitals:
+            origin_pos, origin_hospital = self.random.choice(available_hospitals)
+            dest_pos, dest_hospital = self.random.choice(destination_hospitals)
+
+            if origin_pos != dest_pos:
+                supply_type = self.random.choice(list(dest_hospital['needs'].keys()))
+                self.create_new_drone(origin_hospital, origin_pos, dest_hospital, dest_pos, supply_type)
+
+    def create_new_drone(self, origin_hospital, origin_pos, dest_hospital, dest_pos, supply_type):
+        drone_id = f"D{len(self.drones) + 1}"
+        slot = self.drones.add(drone_id, origin_pos, dest_pos, self.initial_path(origin_pos, dest_pos),
+                               origin_hospital['id'], supply_type, self.tick_count)
+        self.route_new_drone(slot)
+        origin_hospital['drones'] += 1
+        self.active_routes += 1
+        self.log_drone_created(slot)
+
+    def plans_through_time(self):
+        return self.use_cooperative or self.use_forecast
+
+    def initial_path(self, start, end):
+        # Space-time routes are planned per slot once the drone exists
+        if self.plans_through_time():
+            return []
+        return self.find_path(start, end)
+
+    def route_new_drone(self, slot):
+        if self.plans_through_time():
+            self.drones.set_path(slot, self.cooperative.plan(slot, self.move_step))
+
+    def log_drone_created(self, slot):
+        if self.event_log is not None:
+            x, y = self.drones.pos[slot].tolist()
+            dx, dy = self.drones.destination[slot].tolist()
+            self.event_log.record(self.tick_count, DRONE_CREATED, slot, x, y, dx, dy)
+
+    def update_drones(self):
+        self.drone_move_timer += 1
+        if self.drone_move_timer < self.drone_move_interval:
+            return
+
+        self.drone_move_timer = 0
+        step = self.move_step
+        self.move_step += 1
+
+        drones = self.drones
+        slots = drones.slots()
+        cooperative = self.cooperative if self.plans_through_time() else None
+        if cooperative is not None:
+            cooperative.table.advance(step)
+            # Extend reservations before drones run past their window
+            for slot in slots.tolist():
+                if cooperative.due(slot, step):
+                    new_path = cooperative.plan(slot, step)
+                    if new_path:
+                        drones.set_path(slot, new_path)
+        routed = drones.has_path(slots)
+        parked = slots[~routed]
+        slots = slots[routed]
+        if not len(slots):
+            return
+
+        n = self.grid_size
+        next_cells = drones.next_cells(slots)
+        flat = next_cells[:, 1] * n + next_cells[:, 0]
+        near = self.obstacle_field.proximity_array[flat] > 0
+        blocked = self.blocked_mask()[flat]
+        # Space-time paths can wait in place, which never counts as entering
+        # a cell near an obstacle
+        near &= (next_cells != drones.pos[slots]).any(axis=1)
+
+        # Drones blocked by an obstacle or building replan and wait this step
+        stalled = near | blocked
+        replan = stalled
+        if self.use_forecast:
+            # Forecast routes already price in moving obstacles, so a drone
+            # that meets one holds position and replans a little later,
+            # once the obstacle has moved on
+            replan = blocked
+            cooperative.expedite(slots[stalled & ~blocked].tolist(), step)
+        if self.use_cooperative:
+            here = drones.pos[slots]
+            parked = drones.pos[parked]
+            held = cooperative.resolve_conflicts((here[:, 1] * n + here[:, 0]).tolist(), flat.tolist(),
+                                                 stalled, (parked[:, 1] * n + parked[:, 0]).tolist())
+            replan = replan | (held & ~stalled)
+            stalled = held
+        log = self.event_log
+        for slot in slots[replan].tolist():
+            self.replan_count += 1
+            new_path = self.replan_drone(slot)
+            if new_path:
+                drones.set_path(slot, new_path)
+            if log is not None:
+                x, y = drones.pos[slot].tolist()
+                dx, dy = drones.destination[slot].tolist()
+                log.record(self.tick_count, DRONE_REPLANNED, slot, x, y, dx, dy)
+
+        moving = ~stalled
+        slots = slots[moving]
+        if not len(slots):
+            return
+        next_cells = next_cells[moving]
+        current = drones.pos[slots]
+        new_pos = current + np.clip(next_cells - current, -1, 1)
+
+        drones.push_trail(slots, current)
+        drones.pos[slots] = new_pos
+        if log is not None:
+            log.record_many(self.tick_count, DRONE_MOVED, slots, new_pos, current)
+
+        reached = (new_pos == next_cells).all(axis=1)
+        drones.cursor[slots[reached]] += 1
+
+        delivered = (new_pos == drones.destination[slots]).all(axis=1)
+        for slot in slots[delivered].tolist():
+            self.complete_delivery(slot)
+
+    def update_moving_obstacles(self):
+        self.obstacle_move_timer += 1
+        if self.obstacle_move_timer < self.obstacle_move_interval:
+            return
+
+        self.obstacle_move_timer = 0
+
+        self.obstacle_spawn_timer += 1
+        if (self.obstacle_spawn_timer >= self.obstacle_spawn_interval and
+            len(self.obstacles) < self.max_obstacles):
+            for _ in range(3):
+                self.spawn_moving_obstacle()
+            self.obstacle_spawn_timer = 0
+
+        obstacles = self.obstacles
+        slots = obstacles.slots()
+        if not len(slots):
+            return
+        count = len(slots)
+        current = obstacles.pos[slots]
+        obstacles.push_trail(slots, current)
+
+        # Some obstacles pick a new axis-aligned heading
+        rng = self.np_random
+        turning = rng.random(count) < OBSTACLE_TURN_PROBABILITY
+        horizontal = rng.random(count) < 0.5
+        sign = rng.choice(np.array([-1, 1], dtype=np.int32), count)
+        headings = np.where(horizontal[:, None],
+                            np.stack([sign, np.zeros_like(sign)], axis=1),
+                            np.stack([np.zeros_like(sign), sign], axis=1))
+        directions = np.where(turning[:, None], headings, obstacles.direction[slots])
+        obstacles.direction[slots] = directions
+
+        new_pos = current + directions
+        n = self.grid_size
+        inside = ((new_pos >= 0) & (new_pos < n)).all(axis=1)
+
+        self.obstacle_field.apply(current, new_pos[inside])
+        obstacles.remove(slots[~inside])
+
+        slots = slots[inside]
+        new_pos = new_pos[inside]
+        obstacles.pos[slots] = new_pos
+        transparent = self.hospital_mask()[new_pos[:, 1] * n + new_pos[:, 0]]
+        obstacles.transparent[slots] = transparent
+
+        if self.on_effect is not None:
+            for x, y in new_pos[transparent].tolist():
+                self.emit_effect(EFFECT_OBSTACLE_CROSSING, (x, y))
+
+    def spawn_moving_obstacle(self):
+        if self.random.random() < 0.5:
+            x = self.random.choice([0, self.grid_size-1])
+            y = self.random.randint(0, self.grid_size-1)
+            dx = 1 if x == 0 else -1
+            dy = 0
+        else:
+            x = self.random.randint(0, self.grid_size-1)
+            y = self.random.choice([0, self.grid_size-1])
+            dx = 0
+            dy = 1 if y == 0 else -1
+
+        slot = self.obstacles.spawn(x, y, dx, dy)
+        self.obstacle_field.add(x, y)
+        if self.event_log is not None:
+            self.event_log.record(self.tick_count, OBSTACLE_SPAWNED, slot, x, y, x + dx, y + dy)
+
+    @property
+    def buildings(self):
+        """Set of building cells as (x, y), collected from the grid on first use.
+
+        The grid is the source of truth; planners never read this set.
+        """
+        if self._buildings is None:
+            ys, xs = np.nonzero(self.grid == BUILDING)
+            self._buildings = set(zip(xs.tolist(), ys.tolist()))
+        return self._buildings
+
+    def blocked_mask(self):
+        """Flat boolean array of cells drones cannot enter."""
+        return self.astar.blocked_mask(self.grid)
+
+    def hospital_mask(self):
+        if self._hospital_mask is None:
+            mask = np.zeros(self.grid_size * self.grid_size, dtype=bool)
+            for x, y in self.hospitals:
+                mask[y * self.grid_size + x] = True
+            self._hospital_mask = mask
+        return self._hospital_mask
+
+    def find_path(self, start, end):
+        if self.use_distance_fields and end in self.hospitals:
+            return self.distance_fields.path(start, end)
+        if self.use_hierarchical:
+            return self.hierarchy.find_path(start, end)
+
+        path = self.path_cache.get(start, end, self.map_version, self.cost_log)
+        if path is None:
+            planner = self.jps if self.use_jps else self.astar
+            path = planner.find_path(start, end, self.grid)
+            self.path_cache.put(start, end, self.map_version, self.cost_log.epoch, path)
+        return path
+
+    def get_neighbors(self, pos):
+        neighbors = []
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0),
+                       (1, 1), (-1, 1), (1, -1), (-1, -1)]:
+            new_x, new_y = pos[0] + dx, pos[1] + dy
+            if self.is_valid_move(new_x, new_y):
+                neighbors.append((new_x, new_y))
+        return neighbors
+
+    def heuristic(self, a, b):
+        return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
+
+    def check_obstacle_proximity(self, pos, radius=2):
+        return self.obstacle_field.count(pos[0], pos[1], radius)
+
+    def is_valid_move(self, x, y):
+        if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+            return False
+        return self.grid[y, x] != BUILDING
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.grid_size and 0 <= y < self.grid_size
+
+    def add_building(self, x, y):
+        if not self.in_bounds(x, y) or self.grid[y, x] != EMPTY:
+            return False
+        self.grid[y, x] = BUILDING
+        if self._buildings is not None:
+            self._buildings.add((x, y))
+        self.cost_log.record(x, y)
+        self.astar.invalidate()
+        self.map_version += 1
+        self.hierarchy.building_added(x, y)
+        return True
+
+    def add_hospital(self, x, y):
+        if not self.in_bounds(x, y) or self.grid[y, x] != EMPTY:
+            return None
+        hospital_id = f"H{len(self.hospitals) + 1}"
+        specialties = self.random.sample(list(self.possible_supplies.keys()), 2)
+        needs = self.random.sample([s for s in self.possible_supplies.keys() if s not in specialties], 2)
+
+        hospital = {
+            'id': hospital_id,
+            'specialties': {s: self.possible_supplies[s]['production'] for s in specialties},
+            'needs': {n: 0 for n in needs},
+            'drones': 0,
+            'pos': (x, y)
+        }
+        self.hospitals[(x, y)] = hospital
+        self.hospital_positions[hospital_id] = (x, y)
+        self._hospital_mask = None
+
+        self.grid[y, x] = HOSPITAL
+        self.emit_effect(EFFECT_HOSPITAL_ADDED, (x, y))
+        return hospital
+
+    def random_layout(self, hospital_count=5, building_density=0.1):
+        """Place hospitals and buildings on random empty cells."""
+        ys, xs = np.nonzero(self.grid == EMPTY)
+        cells = list(zip(xs.tolist(), ys.tolist()))
+        self.random.shuffle(cells)
+        for x, y in cells[:hospital_count]:
+            self.add_hospital(x, y)
+        building_count = int(len(cells) * building_density)
+        for x, y in cells[hospital_count:hospital_count + building_count]:
+            self.add_building(x, y)
+
+    def import_map(self, path):
+        """Replace the layout with the map at ``path`` (see ``city_map.load_map``)."""
+        self.load_layout(load_map(path))
+
+    def load_layout(self, grid):
+        """Clear the simulation and take over ``grid``, an (n, n) uint8 array of cell codes.
+
+        The array is used as is, so a memory-mapped map stays mapped; the
+        planners build their passability straight from it. Hospitals get
+        their records one by one, as they are few.
+        """
+        if grid.shape[0] != self.grid_size:
+            raise ValueError(f"Map size {grid.shape[0]} does not match engine grid size {self.grid_size}")
+        self.clear()
+        ys, xs = np.nonzero(grid == HOSPITAL)
+        grid[ys, xs] = EMPTY
+        self.grid = grid
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.add_hospital(x, y)
+        self.astar.invalidate()
+        self.map_version += 1
+
+    def export_map(self, path):
+        """Write the layout to ``path`` in the format its extension names."""
+        save_map(self.grid, path)
+
+    def deploy_drone(self):
+        if self.use_dispatcher:
+            self.dispatcher.dispatch(limit=1)
+            return
+        hospitals = list(self.hospitals.items())
+        if len(hospitals) >= 2:
+            src_pos, src_hospital = self.random.choice(hospitals)
+            possible_dests = [(pos, hosp) for pos, hosp in hospitals
+                            if pos != src_pos and hosp['needs']]
+
+            if possible_dests and src_hospital['drones'] < 3:
+                dest_pos, dest_hospital = self.random.choice(possible_dests)
+                supply_type = self.random.choice(list(dest_hospital['needs'].keys()))
+                self.create_new_drone(src_hospital, src_pos, dest_hospital, dest_pos, supply_type)
+
+    def update_hospital_needs(self):
+        for hospital in self.hospitals.values():
+            # 5% chance to update needs
+            if self.random.random() < 0.05:
+                available_supplies = [s for s in self.possible_supplies.keys()
+                                if s not in hospital['needs']]
+                if available_supplies:
+                    new_need = self.random.choice(available_supplies)
+                    hospital['needs'][new_need] = 0
+
+    def deploy_drones(self):
+        if not self.deploy_active or not self.simulation_running:
+            return
+
+        self.deploy_timer += 1
+        if self.deploy_timer < self.deploy_interval:
+            return
+
+        self.deploy_timer = 0
+
+        # Deploy based on count
+        if self.use_dispatcher:
+            self.dispatcher.dispatch(limit=self.deploy_count)
+            return
+        for _ in range(self.deploy_count):
+            self.deploy_single_drone()
+
+    def deploy_single_drone(self):
+        if self.use_dispatcher:
+            self.dispatcher.dispatch(limit=1)
+            return
+        hospitals = list(self.hospitals.items())
+        if len(hospitals) >= 2:
+            src_pos, src_hospital = self.random.choice(hospitals)
+            possible_dests = [(pos, hosp) for pos, hosp in hospitals
+                            if pos != src_pos and len(hosp['needs']) > 0]
+
+            if possible_dests and src_hospital['drones'] < 3:
+                dest_pos, dest_hospital = self.random.choice(possible_dests)
+                supply_type = self.random.choice(list(dest_hospital['needs'].keys()))
+                self.create_new_drone(src_hospital, src_pos, dest_hospital, dest_pos, supply_type)
+
+    # Order of the stages in one tick; looked up by name at call time.
+    TICK_STAGES = ('deploy_drones', 'update_drones', 'update_moving_obstacles', 'process_alerts',
+                   'generate_tick_alerts', 'drain_alerts', 'update_hospital_needs')
+
+    def update_simulation(self):
+        if not self.simulation_running:
+            return
+        profiler = self.profiler
+        run = _run_stage if profiler is None else profiler.run
+        started = time.perf_counter()
+        for stage in self.TICK_STAGES:
+            run(stage, getattr(self, stage))
+        if profiler is not None:
+            profiler.record('tick', time.perf_counter() - started)
+            profiler.end_tick(self.profile_counters(), self.tick_count)
+        self.tick_count += 1
+
+    def profile_counters(self):
+        """Running totals the profiler turns into per-tick counts."""
+        cache = self.path_cache
+        return {
+            'astar_expansions': self.astar.expansions,
+            'astar_searches': self.astar.searches,
+            'hpa_expansions': self.hierarchy.expansions,
+            'jps_expansions': self.jps.expansions,
+            'replans': self.replan_count,
+            'cooperative_expansions': self.cooperative.expansions,
+            'reservations': len(self.cooperative.table),
+            'path_cache_hits': cache.hits + cache.partial_hits,
+            'path_cache_misses': cache.misses,
+            'deliveries': self.total_deliveries,
+            'drones': len(self.drones),
+            'obstacles': len(self.obstacles),
+        }
+
+    def step(self, n_ticks=1):
+        """Advance the simulation by n_ticks and return the number of ticks run."""
+        ran = 0
+        for _ in range(n_ticks):
+            if not self.simulation_running:
+                break
+            self.update_simulation()
+            ran += 1
+        return ran
+
+    def complete_delivery(self, slot):
+        self.total_deliveries += 1
+        self.active_routes -= 1
+
+        # Update origin hospital
+        drones = self.drones
+        self.delivery_latencies.append(self.tick_count - int(drones.created_tick[slot]))
+        origin_pos = self.hospital_positions.get(drones.origin_ids[slot])
+        if origin_pos is not None:
+            self.hospitals[origin_pos]['drones'] -= 1
+
+        # Update destination hospital's needs
+        dest_pos = tuple(drones.destination[slot].tolist())
+        if dest_pos in self.hospitals:
+            dest_hospital = self.hospitals[dest_pos]
+            supply_type = drones.supply_types[slot]
+            if supply_type in dest_hospital['needs']:
+                dest_hospital['needs'].pop(supply_type)
+
+        self.emit_effect(EFFECT_DELIVERY, dest_pos)
+        if self.event_log is not None:
+            self.event_log.record(self.tick_count, DRONE_DELIVERED, slot, dest_pos[0], dest_pos[1])
+        self.cooperative.release(slot)
+        drones.remove(slot)
+
+    def find_safe_path(self, start, end):
+        return self.find_path(start, end)
+
+    def replan_drone(self, slot):
+        if self.plans_through_time():
+            # Called mid-round for a waiting drone: it leaves next round
+            return self.cooperative.plan(slot, self.move_step)
+        drones = self.drones
+        pos = tuple(drones.pos[slot].tolist())
+        destination = tuple(drones.destination[slot].tolist())
+        if self.use_distance_fields and destination in self.hospitals:
+            return self.distance_fields.path(pos, destination)
+        return self.find_safe_path(pos, destination)
+
+    def start(self, alerts=True):
+        self.drones.clear()
+        self.cooperative.clear()
+        self.active_hospital_drones.clear()
+        self.create_alert_file()
+
+        self.simulation_running = True
+
+        self.obstacles.clear()
+        self.obstacle_field.clear()
+        self.cost_log.reset()
+        self.obstacle_spawn_timer = 0
+
+        for _ in range(20):
+            self.spawn_moving_obstacle()
+
+        self.drone_move_timer = 0
+        self.obstacle_move_timer = 0
+
+        self.alert_channel.clear()
+        self.alert_ticks_left = 0 if alerts else None
+
+    def stop(self):
+        self.simulation_running = False
+        if self.event_log is not None:
+            self.event_log.flush()
+        self.deploy_active = False
+
+    def flush_derived_state(self):
+        """Drop planner caches; they are rebuilt on demand with the same results."""
+        self.path_cache.clear()
+        self.distance_fields.clear()
+        self.hierarchy.clear()
+
+    def save_snapshot(self, path):
+        save_snapshot(self, path)
+
+    def restore_snapshot(self, path):
+        load_snapshot(self, path)
+
+    def clear(self):
+        self.simulation_running = False
+        self.alert_ticks_left = None
+
+        self.grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+        self.hospitals.clear()
+        self.hospital_positions.clear()
+        self._hospital_mask = None
+        self._buildings = None
+        self.astar.invalidate()
+        self.map_version += 1
+        self.path_cache.clear()
+        self.distance_fields.clear()
+        self.hierarchy.clear()
+        self.drones.clear()
+        self.cooperative.clear()
+        self.forecast.clear()
+        self.obstacles.clear()
+        self.obstacle_field.clear()
+        self.cost_log.reset()
+        self.alert_channel.clear()
+        self.active_hospital_drones.clear()
+        if self.event_log is not None:
+            self.event_log.flush()
+
+        self.create_alert_file()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the drone simulation without a display.")
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--sim-seconds', type=float,
+                        help="simulated time to run instead of --ticks")
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE)
+    parser.add_argument('--hospitals', type=int, default=5)
+    parser.add_argument('--building-density', type=float, default=0.1)
+    parser.add_argument('--map', metavar='PATH',
+                        help="load the layout from a .npy, .pgm or .ppm map (sets the grid size)")
+    parser.add_argument('--export-map', metavar='PATH', help="write the layout to a map file")
+    parser.add_argument('--deploy-count', type=int, default=1)
+    parser.add_argument('--path-cache-size', type=int, default=1024)
+    parser.add_argument('--distance-fields', action='store_true',
+                        help="route drones by per-hospital distance fields")
+    parser.add_argument('--dispatcher', action='store_true',
+                        help="assign needs to supplying hospitals by min-cost matching")
+    parser.add_argument('--hierarchical', action='store_true',
+                        help="route by HPA* over cluster entrances (for large grids)")
+    parser.add_argument('--jps', action='store_true',
+                        help="search by Jump Point Search where no obstacle is near")
+    parser.add_argument('--cooperative', action='store_true',
+                        help="plan drones around each other's space-time reservations")
+    parser.add_argument('--forecast', action='store_true',
+                        help="plan drones through time around forecast obstacle positions")
+    parser.add_argument('--forecast-horizon', type=int, default=48,
+                        help="ticks ahead the obstacle forecast covers")
+    parser.add_argument('--event-log', metavar='DIR',
+                        help="record simulation events to segments in DIR")
+    parser.add_argument('--event-format', choices=['binary', 'csv'], default='binary')
+    parser.add_argument('--seed', type=int, help="seed for a deterministic, reproducible run")
+    parser.add_argument('--load-snapshot', metavar='PATH', help="continue from a saved snapshot")
+    parser.add_argument('--save-snapshot', metavar='PATH', help="save a snapshot when the run ends")
+    parser.add_argument('--profile', action='store_true', help="time each tick stage")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="append a JSON profile summary to PATH periodically (implies --profile)")
+    parser.add_argument('--profile-interval', type=int, default=600,
+                        help="ticks between profile dumps")
+    args = parser.parse_args()
+
+    city = load_map(args.map) if args.map else None
+    if args.load_snapshot:
+        grid_size = snapshot_grid_size(args.load_snapshot)
+    else:
+        grid_size = city.shape[0] if city is not None else args.grid_size
+    engine = SimulationEngine(grid_size=grid_size, alert_file=None,
+                              path_cache_size=args.path_cache_size, seed=args.seed)
+    if args.event_log:
+        engine.event_log = EventLog(args.event_log, args.event_format)
+    if args.profile or args.profile_out:
+        engine.profiler = TickProfiler(dump_path=args.profile_out, dump_interval=args.profile_interval)
+    if args.load_snapshot:
+        engine.restore_snapshot(args.load_snapshot)
+    else:
+        if city is not None:
+            engine.load_layout(city)
+            if not engine.hospitals:
+                engine.random_layout(args.hospitals, 0)
+        else:
+            engine.random_layout(args.hospitals, args.building_density)
+        engine.start(alerts=False)
+        engine.deploy_count = args.deploy_count
+        engine.use_distance_fields = args.distance_fields
+        engine.use_dispatcher = args.dispatcher
+        engine.use_hierarchical = args.hierarchical
+        engine.use_jps = args.jps
+        engine.use_cooperative = args.cooperative
+        engine.use_forecast = args.forecast
+        engine.forecast_horizon = args.forecast_horizon
+        engine.deploy_active = True
+    if args.export_map:
+        engine.export_map(args.export_map)
+
+    started = time.perf_counter()
+    ticks = round(args.sim_seconds * TICK_RATE) if args.sim_seconds is not None else args.ticks
+    ran = engine.step(ticks)
+    elapsed = time.perf_counter() - started
+    print(f"Ran {ran} ticks in {elapsed:.2f}s ({ran / max(elapsed, 1e-9):.0f} ticks/s, "
+          f"{ran / TICK_RATE / max(elapsed, 1e-9):.0f}x real time)")
+    print(f"Deliveries: {engine.total_deliveries}  Active routes: {engine.active_routes}")
+    print(f"Path cache: {engine.path_cache.stats()}")
+    print(f"Alert channel: {engine.alert_channel.stats()}")
+    if engine.event_log is not None:
+        engine.event_log.close()
+        print(f"Event log: {engine.event_log.written} events in {args.event_log}")
+    if engine.profiler is not None:
+        for stage, mean, p95 in engine.profiler.slowest():
+            print(f"  {stage:<24} mean {mean:8.3f} ms  p95 {p95:8.3f} ms")
+    if args.save_snapshot:
+        engine.save_snapshot(args.save_snapshot)
+        print(f"Snapshot at tick {engine.tick_count} saved to {args.save_snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+from array import array
+
+import numpy as np
+
+from city_map import BUILDING
+
+SNAPSHOT_VERSION = 1
+
+# Engine attributes saved verbatim (all ints, bools or None)
+ENGINE_FIELDS = [
+    'tick_count', 'move_step', 'total_deliveries', 'active_routes', 'emergency_count', 'replan_count',
+    'simulation_running', 'map_version',
+    'drone_move_timer', 'drone_move_interval',
+    'obstacle_spawn_timer', 'obstacle_spawn_interval',
+    'obstacle_move_timer', 'obstacle_move_interval', 'max_obstacles',
+    'use_distance_fields', 'use_dispatcher', 'use_cooperative',
+    'use_forecast', 'forecast_horizon', 'use_hierarchical', 'use_jps',
+    'deploy_count', 'deploy_active', 'deploy_timer', 'deploy_interval',
+    'seed', 'deterministic', 'alert_ticks_left',
+]
+
+
+def save_snapshot(engine, path):
+    """Write the engine's full simulation state to ``path``.
+
+    The file is a compressed ``.npz`` archive: bulk state (grid, entity
+    columns, path pool, reservations, forecast volume, delivery latencies,
+    Mersenne Twister state) as typed arrays, and the small irregular
+    remainder (hospitals, scalars, NumPy RNG state) as one JSON blob.
+    Derived state - planner trees, path cache, distance fields, obstacle
+    proximity - is not stored; saving flushes it from the live engine as
+    well so that it and a restored copy continue identically. Rebuilding
+    it gives the same results, so saving does not change the run.
+    Alerts still queued in the channel are not part of the snapshot.
+    """
+    engine.flush_derived_state()
+
+    grid = np.array(engine.grid, dtype=np.uint8)
+    arrays = {
+        'grid': grid,
+        # (x, y) building cells, redundant with the grid but kept for readers of the format
+        'buildings': np.argwhere(grid == BUILDING)[:, ::-1].astype(np.int32),
+    }
+    stores = (('drones', engine.drones), ('obstacles', engine.obstacles),
+              ('cooperative', engine.cooperative), ('forecast', engine.forecast))
+    for prefix, store in stores:
+        for name, array in store.state().items():
+            arrays[f"{prefix}.{name}"] = array
+
+    arrays['delivery_latencies'] = np.array(engine.delivery_latencies, dtype=np.int64)
+
+    random_version, random_state, gauss_next = engine.random.getstate()
+    arrays['random_state'] = np.array(random_state, dtype=np.uint32)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'grid_size': engine.grid_size,
+        'engine': {name: getattr(engine, name) for name in ENGINE_FIELDS},
+        'hospitals': [
+            [x, y, h['id'], h['drones'], list(h['specialties'].items()), list(h['needs'].items())]
+            for (x, y), h in engine.hospitals.items()
+        ],
+        'drones': engine.drones.meta(),
+        'random': [random_version, gauss_next],
+        'np_random': engine.np_random.bit_generator.state,
+    }
+    arrays['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+    with open(path, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+
+
+def read_meta(meta_bytes):
+    meta = json.loads(meta_bytes.tobytes().decode('utf-8'))
+    if meta['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {meta['version']}")
+    return meta
+
+
+def snapshot_grid_size(path):
+    """Grid size of the snapshot at ``path``, read without loading the rest."""
+    with np.load(path, allow_pickle=False) as data:
+        return read_meta(data['meta'])['grid_size']
+
+
+def load_snapshot(engine, path):
+    """Replace the engine's state with the snapshot at ``path``."""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    meta = read_meta(arrays.pop('meta'))
+    if meta['grid_size'] != engine.grid_size:
+        raise ValueError(f"Snapshot grid size {meta['grid_size']} does not match engine grid size {engine.grid_size}")
+
+    engine.grid = arrays['grid'].astype(np.uint8)
+    engine._buildings = None
+    engine.hospitals.clear()
+    engine.hospital_positions.clear()
+    for x, y, hospital_id, drones, specialties, needs in meta['hospitals']:
+        engine.hospitals[(x, y)] = {
+            'id': hospital_id,
+            'specialties': dict(specialties),
+            'needs': dict(needs),
+            'drones': drones,
+            'pos': (x, y),
+        }
+        engine.hospital_positions[hospital_id] = (x, y)
+
+    def entity_arrays(prefix):
+        start = len(prefix) + 1
+        return {name[start:]: array for name, array in arrays.items() if name.startswith(prefix + '.')}
+
+    engine.drones.load_state(entity_arrays('drones'), meta['drones'])
+    engine.obstacles.load_state(entity_arrays('obstacles'))
+
+    for name, value in meta['engine'].items():
+        # Fields of retired features in older snapshots are skipped
+        if name in ENGINE_FIELDS:
+            setattr(engine, name, value)
+    engine.delivery_latencies = array('q', arrays['delivery_latencies'].astype(np.int64).tobytes())
+
+    random_version, gauss_next = meta['random']
+    engine.random.setstate((random_version, tuple(arrays['random_state'].tolist()), gauss_next))
+    engine.np_random.bit_generator.state = meta['np_random']
+
+    # Rebuild everything derived from the restored map and obstacles
+    engine._hospital_mask = None
+    engine.astar.invalidate()
+    engine.obstacle_field.clear()
+    obstacles = engine.obstacles
+    engine.obstacle_field.apply(added=obstacles.pos[obstacles.slots()])
+    engine.cost_log.reset()
+    engine.alert_channel.clear()
+    engine.flush_derived_state()
+
+    # Reservations and the forecast volume are state, not caches; the
+    # volume is current for the obstacles restored above
+    engine.cooperative.load_state(entity_arrays('cooperative'))
+    engine.forecast.load_state(entity_arrays('forecast'))
@@ -0,0 +1,213 @@
+"""Monte Carlo parameter sweeps over headless, seeded simulation runs.
+
+A sweep spec is a JSON file::
+
+    {
+        "sim_seconds": 3600,
+        "replicates": 8,
+        "seed": 0,
+        "base": {"grid_size": 25, "hospitals": 5, "building_density": 0.1},
+        "grid": {
+            "obstacle_spawn_interval": [2, 4, 8],
+            "max_obstacles": [100, 200],
+            "deploy_count": [1, 3]
+        }
+    }
+
+Every combination of the ``grid`` values (on top of ``base``) is run
+``replicates`` times. Replicate ``i`` of every combination uses seed
+``seed + i``, so combinations are compared on the same random streams.
+Runs are spread over a process pool; each run's metrics are streamed as a
+JSON line as soon as it finishes and the per-combination summary table is
+printed at the end.
+
+    python sweep.py spec.json --out runs.jsonl --summary summary.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from sim_engine import SimulationEngine, GRID_SIZE, TICK_RATE
+
+# Parameters consumed when building the engine and layout; every other
+# parameter must name an existing SimulationEngine attribute
+LAYOUT_PARAMS = {'grid_size': GRID_SIZE, 'hospitals': 5, 'building_density': 0.1}
+
+
+def expand_spec(spec):
+    """Yield (combination index, params, seed) for every run in the spec."""
+    base = dict(spec.get('base', {}))
+    grid = spec.get('grid', {})
+    names = list(grid)
+    replicates = spec.get('replicates', 1)
+    seed = spec.get('seed', 0)
+    for index, values in enumerate(itertools.product(*(grid[name] for name in names))):
+        params = dict(base)
+        params.update(zip(names, values))
+        for replicate in range(replicates):
+            yield index, params, seed + replicate
+
+
+def run_scenario(params, seed, ticks):
+    """Run one seeded headless scenario and return its metrics."""
+    layout = {name: params.get(name, default) for name, default in LAYOUT_PARAMS.items()}
+    engine = SimulationEngine(grid_size=layout['grid_size'], alert_file=None, seed=seed)
+    for name, value in params.items():
+        if name in LAYOUT_PARAMS:
+            continue
+        if not hasattr(engine, name):
+            raise ValueError(f"Unknown scenario parameter: {name}")
+        setattr(engine, name, value)
+
+    engine.random_layout(layout['hospitals'], layout['building_density'])
+    engine.start(alerts=False)
+    engine.deploy_active = True
+
+    started = time.perf_counter()
+    ran = engine.step(ticks)
+    wall = time.perf_counter() - started
+
+    latencies = np.frombuffer(engine.delivery_latencies, dtype=np.int64) / TICK_RATE
+    deliveries = engine.total_deliveries
+    hours = ran / TICK_RATE / 3600
+    return {
+        'params': params,
+        'seed': seed,
+        'ticks': ran,
+        'wall_seconds': wall,
+        'deliveries': deliveries,
+        'deliveries_per_hour': deliveries / hours if hours else 0.0,
+        'latency_mean_s': float(latencies.mean()) if len(latencies) else None,
+        'latency_p95_s': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'replans': engine.replan_count,
+        'replans_per_delivery': engine.replan_count / deliveries if deliveries else None,
+        'latencies_s': latencies.tolist(),
+    }
+
+
+def _run(job):
+    index, params, seed, ticks = job
+    result = run_scenario(params, seed, ticks)
+    result['combination'] = index
+    return result
+
+
+def run_sweep(spec, workers=None, stream=None):
+    """Run every scenario in the spec over a process pool.
+
+    ``stream`` (a text file) receives one JSON line per finished run.
+    Returns the per-run results in completion order.
+    """
+    if 'sim_seconds' in spec:
+        ticks = round(spec['sim_seconds'] * TICK_RATE)
+    else:
+        ticks = spec.get('ticks', 3600 * TICK_RATE)
+    jobs = [(index, params, seed, ticks) for index, params, seed in expand_spec(spec)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_run, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if stream is not None:
+                record = {key: value for key, value in result.items() if key != 'latencies_s'}
+                stream.write(json.dumps(record) + '\n')
+                stream.flush()
+    return results
+
+
+def summarize(results):
+    """One row per parameter combination, aggregated over its replicates.
+
+    Latency statistics pool every delivery of the combination's runs.
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(result['combination'], []).append(result)
+
+    rows = []
+    for index in sorted(groups):
+        runs = groups[index]
+        latencies = np.array([value for run in runs for value in run['latencies_s']])
+        deliveries = sum(run['deliveries'] for run in runs)
+        replans = sum(run['replans'] for run in runs)
+        rate = np.array([run['deliveries_per_hour'] for run in runs])
+        row = dict(runs[0]['params'])
+        row.update({
+            'runs': len(runs),
+            'deliveries_per_hour': float(rate.mean()),
+            'deliveries_per_hour_std': float(rate.std()),
+            'latency_mean_s': float(latencies.mean()) if len(latencies) else None,
+            'latency_p95_s': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'replans_per_delivery': replans / deliveries if deliveries else None,
+            'wall_seconds': sum(run['wall_seconds'] for run in runs),
+        })
+        rows.append(row)
+    return rows
+
+
+def format_table(rows):
+    if not rows:
+        return ''
+    columns = list(rows[0])
+
+    def cell(value):
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
+
+    table = [[cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in table)) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ['  '.join(value.rjust(width) for value, width in zip(line, widths)) for line in table]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo parameter sweep of headless simulations.")
+    parser.add_argument('spec', help="JSON sweep spec")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--out', help="stream per-run metrics as JSON lines to this file ('-' for stdout)")
+    parser.add_argument('--summary', help="write the summary table as CSV")
+    args = parser.parse_args()
+
+    with open(args.spec) as file:
+        spec = json.load(file)
+
+    stream = None
+    if args.out == '-':
+        stream = sys.stdout
+    elif args.out:
+        stream = open(args.out, 'w')
+
+    started = time.perf_counter()
+    try:
+        results = run_sweep(spec, args.workers, stream)
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - started
+
+    rows = summarize(results)
+    print(format_table(rows))
+    print(f"{len(results)} runs in {elapsed:.1f}s")
+
+    if args.summary and rows:
+        with open(args.summary, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()